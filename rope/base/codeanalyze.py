@@ -1,3 +1,4 @@
+import array
 import bisect
 import re
 import token
@@ -37,7 +38,7 @@ class ChangeCollector(object):
 class SourceLinesAdapter(object):
     """Adapts source to Lines interface
 
-    Note: The creation of this class is expensive.
+    The offsets of line starts are kept in an ``array('l')``.
     """
 
     def __init__(self, source_code):
@@ -46,16 +47,11 @@ class SourceLinesAdapter(object):
         self._initialize_line_starts()
 
     def _initialize_line_starts(self):
-        self.starts = []
-        self.starts.append(0)
-        try:
-            i = 0
-            while True:
-                i = self.code.index('\n', i) + 1
-                self.starts.append(i)
-        except ValueError:
-            pass
-        self.starts.append(len(self.code) + 1)
+        starts = [0]
+        starts.extend([match.end()
+                       for match in _newline_pattern.finditer(self.code)])
+        starts.append(len(self.code) + 1)
+        self.starts = array.array('l', starts)
 
     def get_line(self, lineno):
         return self.code[self.starts[lineno - 1]:
@@ -74,6 +70,9 @@ class SourceLinesAdapter(object):
         return self.starts[lineno] - 1
 
 
+_newline_pattern = re.compile('\n')
+
+
 class ArrayLinesAdapter(object):
 
     def __init__(self, lines):
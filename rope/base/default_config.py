@@ -38,6 +38,28 @@ def set_prefs(prefs):
     # Should rope save object information or not.
     prefs['save_objectdb'] = True
     prefs['compress_objectdb'] = False
+    # How to store object information: 'pickle' loads all of it when
+    # the project is opened and saves all of it when it is closed;
+    # 'sqlite' keeps it in an SQLite database and loads and saves the
+    # information of each scope only when needed.
+    prefs['objectdb_storage'] = 'pickle'
+    # The number of calls for which the returned object is kept for
+    # each function; the least recently observed calls are forgotten.
+    # Use `None` for keeping all of them.
+    prefs['max_objectdb_calls'] = 128
+
+    # Should rope save the index of the names used in each file.  It
+    # helps skipping files that do not contain the name in rename and
+    # similar refactorings.
+    prefs['save_nameindex'] = True
+    prefs['compress_nameindex'] = False
+
+    # Should rope save the syntax errors and the global imports of the
+    # modules it parses.  It lets rope report the syntax errors of
+    # unchanged modules and order them by their imports (when
+    # analyzing modules) without parsing them; modules without errors
+    # are still parsed when they are used.
+    prefs['save_module_summaries'] = True
 
     # If `True`, rope analyzes each module when it is being saved.
     prefs['automatic_soa'] = True
@@ -47,9 +69,18 @@ def set_prefs(prefs):
     # If `False` when running modules or unit tests "dynamic object
     # analysis" is turned off.  This makes them much faster.
     prefs['perform_doa'] = True
+    # The number of calls with distinct argument and return types that
+    # "dynamic object analysis" records for each function.  The calls
+    # are collected in the running process and sent in batches.  If
+    # `0`, every call is traced and sent, which is much slower.
+    prefs['max_doa_samples'] = 32
 
     # Rope can check the validity of its object DB when running.
+    # The information about each file is checked when it is first
+    # used; if `validate_objectdb_in_background` is `True` all of the
+    # files are checked in a background thread, too.
     prefs['validate_objectdb'] = True
+    prefs['validate_objectdb_in_background'] = False
 
     # How many undos to hold?
     prefs['max_history_items'] = 32
@@ -3,7 +3,7 @@ import os.path
 
 import rope.base.project
 import rope.base.pycore
-from rope.base import taskhandle
+from rope.base import exceptions, taskhandle, parallel
 
 
 def path_to_resource(project, path, type=None):
@@ -52,14 +52,179 @@ def report_change(project, path, old_content):
         rope.base.pycore.perform_soa_on_changed_scopes(project, resource,
                                                        old_content)
 
-def analyze_modules(project, task_handle=taskhandle.NullTaskHandle()):
+def analyze_modules(project, task_handle=taskhandle.NullTaskHandle(),
+                    processes=None, passes=1):
     """Perform static object analysis on all python files in the project
 
-    Note that this might be really time consuming.
+    Note that this might be really time consuming.  Modules are
+    analyzed after the modules they import.  If `passes` is more than
+    one, the modules whose information changed in a pass and the
+    modules importing them are analyzed again in the next pass, until
+    the information does not change or `passes` passes are done.
+
+    If `processes` is not `None`, the modules are analyzed in that
+    many worker processes (see `rope.base.parallel`); the information
+    each worker adds to its object DB is then added to the object DB
+    of `project`.  Workers of later passes are given the information
+    found in earlier ones.
     """
-    resources = project.pycore.get_python_files()
-    job_set = task_handle.create_jobset('Analyzing Modules', len(resources))
+    in_processes = processes is not None and parallel.is_available()
+    # modules analyzed in this process are loaded while sorting them,
+    # so that they are parsed only once
+    resources, importers = _sort_by_imports(
+        project.pycore, project.pycore.get_python_files(),
+        load_modules=not in_processes)
+    pending = resources
+    # the changes accepted in earlier passes; sent to worker processes
+    known = []
+    for index in range(passes):
+        if not pending:
+            break
+        name = 'Analyzing Modules'
+        if index > 0:
+            name += ' (pass %d)' % (index + 1)
+        job_set = task_handle.create_jobset(name, len(pending))
+        if in_processes and len(pending) > 1:
+            changed = _analyze_in_processes(project, pending, processes,
+                                            job_set, known)
+        else:
+            changed = _analyze_in_this_process(project, pending, job_set)
+        affected = set(changed)
+        for path in changed:
+            affected.update(importers.get(path, ()))
+        pending = [resource for resource in resources
+                   if resource.path in affected]
+
+def _analyze_in_this_process(project, resources, job_set):
+    changed = set()
     for resource in resources:
         job_set.started_job(resource.path)
-        project.pycore.analyze_module(resource)
+        changed.update(change[1] for change in
+                       _analyze_with_delta(project, [resource]))
         job_set.finished_job()
+    return changed
+
+def _analyze_in_processes(project, resources, processes, job_set, known):
+    """Analyze `resources` in worker processes
+
+    Workers reopen the project from disk, so `known`, the changes
+    accepted in earlier passes, is applied once in each of them before
+    its tasks.  The changes accepted in this pass are appended to it.
+    """
+    changed = set()
+    tasks = []
+    for shard in parallel.split(resources, processes * 4):
+        tasks.append(([resource.path for resource in shard],))
+    deltas = parallel.imap(project, _analyze_in_worker, tasks, processes,
+                           setup=(_apply_in_worker, (known,)))
+    accepted = []
+    try:
+        for task in tasks:
+            delta = deltas.next()
+            for path in task[0]:
+                job_set.started_job(path)
+                job_set.finished_job()
+            accepted.extend(project.pycore.object_info.apply_delta(delta))
+    finally:
+        deltas.close()
+    changed.update(change[1] for change in accepted)
+    known.extend(accepted)
+    project.pycore._forget_changed_data()
+    return changed
+
+def _apply_in_worker(project, known):
+    project.pycore.object_info.apply_delta(known)
+
+def _analyze_in_worker(project, paths):
+    return _analyze_with_delta(
+        project, [project.get_file(path) for path in paths])
+
+def _analyze_with_delta(project, resources):
+    """Analyze `resources` and return the changed information"""
+    objectdb = project.pycore.object_info.objectdb
+    objectdb.delta = []
+    try:
+        for resource in resources:
+            project.pycore.analyze_module(resource)
+        return objectdb.delta
+    finally:
+        objectdb.delta = None
+
+def _sort_by_imports(pycore, resources, load_modules=False):
+    """Sort `resources` so that modules come after the ones they import
+
+    Modules that import each other are sorted arbitrarily.  Returns
+    the sorted modules and a dict that maps the path of each module
+    to the paths of the modules that import it.  If `load_modules` is
+    `True`, the `PyModule`\s of `resources` are created and cached
+    while finding their imports.
+    """
+    modules = dict((resource.path, resource) for resource in resources)
+    imports = {}
+    importers = {}
+    for path, resource in modules.items():
+        imported = set(_get_imported_paths(pycore, resource,
+                                           load_modules))
+        imported.intersection_update(modules)
+        imported.discard(path)
+        imports[path] = sorted(imported)
+        for imported_path in imported:
+            importers.setdefault(imported_path, set()).add(path)
+    result = []
+    visited = set()
+    for path in sorted(modules):
+        if path in visited:
+            continue
+        visited.add(path)
+        stack = [(path, iter(imports[path]))]
+        while stack:
+            current, children = stack[-1]
+            for child in children:
+                if child not in visited:
+                    visited.add(child)
+                    stack.append((child, iter(imports[child])))
+                    break
+            else:
+                stack.pop()
+                result.append(modules[current])
+    return result, importers
+
+def _get_imported_paths(pycore, resource, load_modules=False):
+    summary = _get_summary(pycore, resource, load_modules)
+    if summary is None:
+        return
+    for modname, level, names in summary.imports:
+        module = _find_imported_module(pycore, resource.parent,
+                                       modname, level)
+        if module is None:
+            continue
+        modules = [module]
+        if names is not None and module.is_folder():
+            # ``from package import module``
+            for name in names:
+                modules.append(pycore.find_relative_module(name, module, 1))
+        for module in modules:
+            if module is not None and module.is_folder():
+                if not module.has_child('__init__.py'):
+                    continue
+                module = module.get_child('__init__.py')
+            if module is not None:
+                yield module.path
+
+def _find_imported_module(pycore, folder, modname, level):
+    if level == 0:
+        return pycore.find_module(modname, folder)
+    for i in range(level - 1):
+        folder = folder.parent
+        if folder is None:
+            return None
+    return pycore.find_relative_module(modname or '', folder, 1)
+
+def _get_summary(pycore, resource, load_modules=False):
+    if load_modules:
+        # creating the module summarizes it, too
+        try:
+            pycore.resource_to_pyobject(resource)
+        except exceptions.ModuleSyntaxError:
+            pass
+    return pycore.module_cache.summaries.summarize(resource)
@@ -0,0 +1,134 @@
+import re
+
+from rope.base import exceptions, resourceobserver
+
+
+class NameIndex(object):
+    """An index of the names used in project files
+
+    For each file it holds the set of identifier-like words that
+    appear in it (including comments and strings).  It is used for
+    skipping files that cannot contain a name when looking for its
+    occurrences.  Files are indexed the first time they are queried
+    and their entries are dropped whenever they change.
+
+    If ``save_nameindex`` project config is `True`, the index is
+    saved in the project's ropefolder and the entries are checked
+    against modification times and sizes when reused.
+
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.timekeeper = resourceobserver.ChangeIndicator()
+        self.files = {}
+        self._checked = set()
+        self._dirty = False
+        self._load_index()
+        observer = resourceobserver.ResourceObserver(
+            changed=self._changed, moved=self._moved, created=self._changed,
+            removed=self._moved, validate=self._validate)
+        self.project.add_observer(observer)
+        self.project.data_files.add_write_hook(self.write)
+
+    def contains(self, resource, name):
+        """Return `False` if `name` surely does not appear in `resource`"""
+        if resource.project != self.project or resource.is_folder() or \
+           not _is_word(name):
+            return True
+        names = self._get_names(resource)
+        return names is None or name in names
+
+    def filter_resources(self, resources, *names):
+        """Return `resources` that might contain one of `names`"""
+        for name in names:
+            if not _is_word(name):
+                return list(resources)
+        result = []
+        for resource in resources:
+            for name in names:
+                if self.contains(resource, name):
+                    result.append(resource)
+                    break
+        return result
+
+    def _get_names(self, resource):
+        path = resource.path
+        if path in self.files and path not in self._checked:
+            try:
+                indicator = self.timekeeper.get_indicator(resource)
+            except OSError:
+                indicator = None
+            if self.files[path][0] != indicator:
+                self._forget(path)
+        if path not in self.files:
+            try:
+                indicator = self.timekeeper.get_indicator(resource)
+                source = resource.read()
+            except (IOError, OSError, exceptions.ModuleDecodeError):
+                return None
+            names = frozenset(_word_pattern.findall(source))
+            self.files[path] = (indicator, names)
+            self._dirty = True
+        self._checked.add(path)
+        return self.files[path][1]
+
+    def _forget(self, path):
+        if path in self.files:
+            del self.files[path]
+            self._dirty = True
+        self._checked.discard(path)
+
+    def _forget_folder(self, folder):
+        prefix = folder.path + '/'
+        for path in list(self.files):
+            if folder.path == '' or path.startswith(prefix):
+                self._forget(path)
+
+    def _changed(self, resource):
+        if resource.is_folder():
+            self._forget_folder(resource)
+        else:
+            self._forget(resource.path)
+
+    def _moved(self, resource, new_resource=None):
+        self._forget(resource.path)
+        self._forget_folder(resource)
+        if new_resource is not None:
+            self._forget(new_resource.path)
+            self._forget_folder(new_resource)
+
+    def _validate(self, folder):
+        prefix = folder.path + '/'
+        for path in list(self._checked):
+            if folder.path in ('', path) or path.startswith(prefix):
+                self._checked.discard(path)
+
+    def _load_index(self):
+        if self.save:
+            result = self.project.data_files.read_data(
+                'nameindex', compress=self.compress)
+            if result is not None:
+                self.files = result
+
+    def write(self):
+        if self.save and self._dirty:
+            self.project.data_files.write_data('nameindex', self.files,
+                                               compress=self.compress)
+            self._dirty = False
+
+    @property
+    def save(self):
+        return self.project.prefs.get('save_nameindex', False)
+
+    @property
+    def compress(self):
+        return self.project.prefs.get('compress_nameindex', False)
+
+
+_word_pattern = re.compile(r'\w+')
+
+
+def _is_word(name):
+    match = _word_pattern.match(name)
+    return match is not None and match.end() == len(name)
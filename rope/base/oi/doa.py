@@ -1,6 +1,7 @@
 import cPickle as pickle
 import marshal
 import os
+import Queue
 import socket
 import subprocess
 import sys
@@ -12,10 +13,26 @@ class PythonFileRunner(object):
     """A class for running python project files"""
 
     def __init__(self, pycore, file_, args=None, stdin=None,
-                 stdout=None, analyze_data=None):
+                 stdout=None, analyze_data=None, lock=None,
+                 trace_file=None, ingestor=None):
+        """`analyze_data` is called with each received call
+
+        The calls are analyzed in a `DataIngestor` thread while
+        holding `lock`, if it is not `None`.  If `ingestor` is not
+        `None`, that already started `DataIngestor` is used instead
+        and it is not finished with this process.  If `trace_file` is
+        not `None`, the calls are written to that file instead; see
+        `read_trace_file()`.
+
+        """
         self.pycore = pycore
         self.file = file_
         self.analyze_data = analyze_data
+        self.lock = lock
+        self.trace_file = trace_file
+        self.ingestor = ingestor
+        self._shared_ingestor = ingestor is not None
+        self.receiving_thread = None
         self.observers = []
         self.args = args
         self.stdin = stdin
@@ -23,31 +40,52 @@ class PythonFileRunner(object):
 
     def run(self):
         """Execute the process"""
+        self.prepare()
+        self.start()
+
+    def prepare(self):
+        """Get what running the process needs from `pycore`
+
+        `run()` calls it.  If the process is started in another thread
+        using `start()`, this method should be called in the thread
+        that uses `pycore` before that.
+
+        """
         env = dict(os.environ)
-        file_path = self.file.real_path
         path_folders = self.pycore.get_source_folders() + \
                        self.pycore.get_python_path_folders()
         env['PYTHONPATH'] = os.pathsep.join(folder.real_path
                                             for folder in path_folders)
-        runmod_path = self.pycore.find_module('rope.base.oi.runmod').real_path
+        self._env = env
+        self._runmod_path = \
+            self.pycore.find_module('rope.base.oi.runmod').real_path
+        self._max_samples = self.pycore.project.prefs.get(
+            'max_doa_samples', 0)
+        self._project_address = self.pycore.project.address
+
+    def start(self):
+        """Execute the process prepared with `prepare()`"""
+        file_path = self.file.real_path
         self.receiver = None
         self._init_data_receiving()
         send_info = '-'
         if self.receiver:
             send_info = self.receiver.get_send_info()
-        args = [sys.executable, runmod_path, send_info,
-                self.pycore.project.address, self.file.real_path]
-        if self.analyze_data is None:
-            del args[1:4]
+        elif self.trace_file is not None:
+            send_info = os.path.abspath(self.trace_file)
+        args = [sys.executable, self._runmod_path, send_info,
+                str(self._max_samples), self._project_address, file_path]
+        if send_info == '-':
+            del args[1:5]
         if self.args is not None:
             args.extend(self.args)
         self.process = subprocess.Popen(
-            executable=sys.executable, args=args, env=env,
+            executable=sys.executable, args=args, env=self._env,
             cwd=os.path.split(file_path)[0], stdin=self.stdin,
             stdout=self.stdout, stderr=self.stdout, close_fds=os.name != 'nt')
 
     def _init_data_receiving(self):
-        if self.analyze_data is None:
+        if self.analyze_data is None or self.trace_file is not None:
             return
         # Disabling FIFO data transfer due to blocking when running
         # unittests in the GUI.
@@ -56,23 +94,30 @@ class PythonFileRunner(object):
             self.receiver = _SocketReceiver()
         else:
             self.receiver = _FIFOReceiver()
+        if not self._shared_ingestor:
+            self.ingestor = DataIngestor(self.analyze_data, self.lock)
+            self.ingestor.start()
         self.receiving_thread = threading.Thread(target=self._receive_information)
         self.receiving_thread.setDaemon(True)
         self.receiving_thread.start()
 
     def _receive_information(self):
-        #temp = open('/dev/shm/info', 'w')
         for data in self.receiver.receive_data():
-            self.analyze_data(data)
-            #temp.write(str(data) + '\n')
-        #temp.close()
+            if isinstance(data, list):
+                # a batch of calls
+                for call in data:
+                    self.ingestor.put(call)
+            else:
+                self.ingestor.put(data)
+        if not self._shared_ingestor:
+            self.ingestor.finish()
         for observer in self.observers:
             observer()
 
     def wait_process(self):
         """Wait for the process to finish"""
         self.process.wait()
-        if self.analyze_data:
+        if self.receiving_thread is not None:
             self.receiving_thread.join()
 
     def kill_process(self):
@@ -96,6 +141,247 @@ class PythonFileRunner(object):
         self.observers.append(observer)
 
 
+class MultiFileRunner(object):
+    """Runs python files in parallel processes
+
+    Runs are ``(resource, args)`` tuples; for running the shards of a
+    test suite, for instance, the same module can be run with
+    different arguments.  At most `processes` processes are running
+    at once; if it is `None`, the number of CPUs is used.  The
+    information collected in all of the processes is analyzed by a
+    single `DataIngestor`.  When the last process finishes, it is
+    finished and the finishing observers are notified, whether or not
+    `wait_process()` is called.
+
+    """
+
+    def __init__(self, pycore, runs, stdout=None, analyze_data=None,
+                 lock=None, processes=None):
+        self.pycore = pycore
+        self.runs = runs
+        self.stdout = stdout
+        self.analyze_data = analyze_data
+        self.processes = processes or _cpu_count()
+        self.ingestor = None
+        if analyze_data is not None:
+            self.ingestor = DataIngestor(analyze_data, lock)
+        self.runners = []
+        self.observers = []
+        self.threads = []
+        self.pending = Queue.Queue()
+        self._starting = threading.Lock()
+        self._stopped = False
+        self._running = 0
+
+    def run(self):
+        """Start the processes"""
+        if self.ingestor is not None:
+            self.ingestor.start()
+        for resource, args in self.runs:
+            runner = PythonFileRunner(
+                self.pycore, resource, args, stdout=self.stdout,
+                analyze_data=self.analyze_data, ingestor=self.ingestor)
+            # the threads starting the processes do not use pycore
+            runner.prepare()
+            self.pending.put(runner)
+        self._running = min(self.processes, len(self.runs))
+        if self._running == 0:
+            self._finish()
+        for i in range(self._running):
+            thread = threading.Thread(target=self._run_pending)
+            thread.setDaemon(True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _run_pending(self):
+        try:
+            while not self._stopped:
+                try:
+                    runner = self.pending.get_nowait()
+                except Queue.Empty:
+                    break
+                self._starting.acquire()
+                try:
+                    if self._stopped:
+                        break
+                    runner.start()
+                    self.runners.append(runner)
+                finally:
+                    self._starting.release()
+                runner.wait_process()
+        finally:
+            self._starting.acquire()
+            try:
+                self._running -= 1
+                last = self._running == 0
+            finally:
+                self._starting.release()
+            if last:
+                self._finish()
+
+    def _finish(self):
+        if self.ingestor is not None:
+            self.ingestor.finish()
+        for observer in self.observers:
+            observer()
+
+    def wait_process(self):
+        """Wait for all of the processes to finish"""
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def kill_process(self):
+        """Stop all of the processes"""
+        self._starting.acquire()
+        try:
+            self._stopped = True
+            for runner in self.runners:
+                runner.kill_process()
+        finally:
+            self._starting.release()
+
+    def add_finishing_observer(self, observer):
+        """Notify this observer when all of the processes finish"""
+        self.observers.append(observer)
+
+
+def _cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+
+def read_trace_file(path):
+    """Yield the calls written to a DOA trace file
+
+    Trace files are written by processes run with the ``trace_file``
+    argument of `PythonFileRunner` or by running
+    ``rope/base/oi/runmod.py`` directly::
+
+      python runmod.py TRACE_FILE MAX_SAMPLES PROJECT_ROOT MODULE [ARGS]
+
+    Reading stops at the first call that cannot be read, for instance
+    when the process was killed while writing it.
+
+    """
+    trace = open(path, 'rb')
+    try:
+        for data in _read_marshalled(trace):
+            if isinstance(data, list):
+                # a batch of calls
+                for call in data:
+                    yield call
+            else:
+                yield data
+    finally:
+        trace.close()
+
+
+def _read_marshalled(input):
+    while True:
+        try:
+            yield marshal.load(input)
+        except (EOFError, ValueError, TypeError):
+            break
+
+
+class DataIngestor(object):
+    """Analyzes received DOA data in a single worker thread
+
+    Received calls are put in a bounded queue so that receiving them
+    never waits for analyzing them; if the queue is full, the call is
+    dropped.  The worker takes the queued calls in batches, skips the
+    calls it has already analyzed and analyzes the rest while holding
+    `lock`.  `processed`, `duplicates` and `dropped` count the calls
+    and `errors` counts the calls whose analysis raised an exception.
+
+    """
+
+    def __init__(self, analyze_data, lock=None, maxsize=10000,
+                 batch_size=100):
+        self.analyze_data = analyze_data
+        self.lock = lock
+        self.batch_size = batch_size
+        self.queue = Queue.Queue(maxsize)
+        self.seen = set()
+        self.processed = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.errors = 0
+        self.thread = None
+
+    def start(self):
+        """Start the worker thread"""
+        self.thread = threading.Thread(target=self._run)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def put(self, data):
+        """Queue a call for analysis"""
+        try:
+            self.queue.put_nowait(data)
+        except Queue.Full:
+            self.dropped += 1
+
+    def finish(self):
+        """Wait for the queued calls to be analyzed"""
+        if self.thread is not None:
+            # the worker might have died with an exception
+            while self.thread.isAlive():
+                try:
+                    self.queue.put(None, timeout=0.1)
+                    break
+                except Queue.Full:
+                    pass
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        finished = False
+        while not finished:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Queue.Empty:
+                    break
+            if None in batch:
+                batch.remove(None)
+                finished = True
+            self.analyze_batch(batch)
+
+    def analyze_batch(self, batch):
+        """Analyze the calls in `batch` that are not analyzed yet"""
+        calls = []
+        for data in batch:
+            try:
+                if data in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(data)
+            except TypeError:
+                pass
+            calls.append(data)
+        if not calls:
+            return
+        if self.lock is not None:
+            self.lock.acquire()
+        try:
+            for data in calls:
+                try:
+                    self.analyze_data(data)
+                except Exception:
+                    self.errors += 1
+                else:
+                    self.processed += 1
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+
+
 class _MessageReceiver(object):
 
     def receive_data(self):
@@ -153,10 +439,7 @@ class _FIFOReceiver(_MessageReceiver):
 
     def receive_data(self):
         my_file = open(self.file_name, 'rb')
-        while True:
-            try:
-                yield marshal.load(my_file)
-            except EOFError:
-                break
+        for data in _read_marshalled(my_file):
+            yield data
         my_file.close()
         os.remove(self.file_name)
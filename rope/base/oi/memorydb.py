@@ -82,6 +82,8 @@ class ScopeInfo(objectdb.ScopeInfo):
     def __init__(self):
         self.call_info = {}
         self.per_name = {}
+        self.call_uses = {}
+        self._last_use = 0
 
     def get_per_name(self, name):
         return self.per_name.get(name, None)
@@ -98,9 +100,24 @@ class ScopeInfo(objectdb.ScopeInfo):
 
     def add_call(self, parameters, returned):
         self.call_info[parameters] = returned
+        self._last_use += 1
+        self.call_uses[parameters] = self._last_use
+
+    def limit_calls(self, count):
+        # trimming only after exceeding `count` by a quarter to avoid
+        # sorting the calls each time a call is added; `call_uses` is
+        # not saved, so the calls loaded from disk are trimmed first
+        if len(self.call_info) > count + count // 4:
+            calls = sorted(self.call_info,
+                           key=lambda args: self.call_uses.get(args, 0))
+            for args in calls[:len(calls) - count]:
+                del self.call_info[args]
+                self.call_uses.pop(args, None)
 
     def __getstate__(self):
         return (self.call_info, self.per_name)
 
     def __setstate__(self, data):
         self.call_info, self.per_name = data
+        self.call_uses = {}
+        self._last_use = 0
@@ -1,13 +1,27 @@
+import threading
 import UserDict
 
 
 class ObjectDB(object):
 
-    def __init__(self, db, validation):
+    # the maximum number of textual forms shared by `_intern()`
+    max_interned = 65536
+
+    def __init__(self, db, validation, max_calls=None):
+        """`max_calls` limits the calls held for each scope"""
         self.db = db
         self.validation = validation
+        self.max_calls = max_calls
         self.observers = []
         self.files = db.files
+        self._interned = {}
+        self._checked = None
+        self._unchecked = set()
+        self._validate_in_background = False
+        self._validation_thread = None
+        self._invalid = set()
+        # if not `None`, the information changed is appended to it
+        self.delta = None
 
     def validate_files(self):
         for file in list(self.files):
@@ -15,6 +29,72 @@ class ObjectDB(object):
                 del self.files[file]
                 self._file_removed(file)
 
+    def validate_files_lazily(self, background=False):
+        """Validate each file the first time it is used
+
+        Valid files are reported to file list observers using their
+        `added()` method when they are first used.  If `background` is
+        `True`, the files are checked in a background thread, too; the
+        invalid ones are removed when they are used or when the DB is
+        written.  The thread is started when a file is first used, so
+        that it does not run while the DB and its users are being
+        created.  It uses `validation.is_file_valid_in_thread()`.
+
+        """
+        self._checked = set()
+        # computed when first needed
+        self._unchecked = None
+        self._validate_in_background = background
+
+    def _start_background_validation(self):
+        self._validate_in_background = False
+        thread = threading.Thread(target=self._find_invalid_files,
+                                  args=(list(self.files.keys()),))
+        thread.setDaemon(True)
+        thread.start()
+        self._validation_thread = thread
+
+    def is_checked(self, file):
+        """Return `True` if `file` is validated and observed"""
+        return self._checked is None or file in self._checked
+
+    def get_unchecked_files(self):
+        """Return the files of the DB that are not validated yet"""
+        return list(self._get_unchecked())
+
+    def _get_unchecked(self):
+        if self._unchecked is None:
+            self._unchecked = set(self.files.keys()) - self._checked
+        return self._unchecked
+
+    def _find_invalid_files(self, files):
+        for file in files:
+            if not self.validation.is_file_valid_in_thread(file):
+                self._invalid.add(file)
+
+    def check_file(self, file):
+        """Validate and observe `file` if it is not checked yet"""
+        if self._checked is None or file in self._checked:
+            return
+        if self._validate_in_background:
+            self._start_background_validation()
+        self._checked.add(file)
+        if self._unchecked is not None:
+            self._unchecked.discard(file)
+        if file in self.files:
+            if file in self._invalid or \
+               not self.validation.is_file_valid(file):
+                del self.files[file]
+                self._file_removed(file)
+            else:
+                self._file_added(file)
+
+    def _remove_invalid_files(self):
+        for file in list(self._invalid):
+            self._invalid.discard(file)
+            if file in self._get_unchecked():
+                self.check_file(file)
+
     def validate_file(self, file):
         if file not in self.files:
             return
@@ -26,6 +106,11 @@ class ObjectDB(object):
         if file not in self.files:
             return
         self.files.rename(file, newfile)
+        if self._checked is not None:
+            self._checked.discard(file)
+            self._checked.add(newfile)
+            if self._unchecked is not None:
+                self._unchecked.discard(file)
         self._file_removed(file)
         self._file_added(newfile)
 
@@ -52,21 +137,74 @@ class ObjectDB(object):
         scope_info = self._get_scope_info(path, key, readonly=False)
         old_returned = scope_info.get_returned(args)
         if self.validation.is_more_valid(returned, old_returned):
-            scope_info.add_call(args, returned)
+            scope_info.add_call(self._intern(args), self._intern(returned))
+            if self.max_calls is not None:
+                scope_info.limit_calls(self.max_calls)
+            if self.delta is not None and returned != old_returned:
+                self.delta.append(('call', path, key, args, returned))
 
     def add_pername(self, path, key, name, value):
         scope_info = self._get_scope_info(path, key, readonly=False)
         old_value = scope_info.get_per_name(name)
         if self.validation.is_more_valid(value, old_value):
-            scope_info.save_per_name(name, value)
+            scope_info.save_per_name(name, self._intern(value))
+            if self.delta is not None and value != old_value:
+                self.delta.append(('pername', path, key, name, value))
+
+    def apply_delta(self, delta):
+        """Add the information recorded in `delta` to this DB
+
+        `delta` is a list that was assigned to `delta` attribute of
+        another `ObjectDB`.  The usual validity rules decide whether
+        it replaces the information already in this DB.  Returns the
+        changes that were accepted.
+
+        """
+        old_delta = self.delta
+        self.delta = []
+        try:
+            for change in delta:
+                if change[0] == 'call':
+                    self.add_callinfo(*change[1:])
+                else:
+                    self.add_pername(*change[1:])
+            accepted = self.delta
+        finally:
+            self.delta = old_delta
+        if old_delta is not None:
+            old_delta.extend(accepted)
+        return accepted
+
+    def _intern(self, value):
+        """Return a shared object equal to `value`
+
+        Textual forms, like ``('defined', path, lineno)`` tuples, are
+        repeated in many calls; sharing them saves memory and makes
+        pickles store each of them once.  The table is cleared when
+        the DB is written or when it grows too large.
+
+        """
+        if isinstance(value, tuple):
+            value = tuple([self._intern(item) for item in value])
+        elif not isinstance(value, basestring):
+            return value
+        if len(self._interned) >= self.max_interned:
+            self._interned.clear()
+        try:
+            return self._interned.setdefault(value, value)
+        except TypeError:
+            return value
 
     def add_file_list_observer(self, observer):
         self.observers.append(observer)
 
     def write(self):
+        self._remove_invalid_files()
         self.db.write()
+        self._interned.clear()
 
     def _get_scope_info(self, path, key, readonly=True):
+        self.check_file(path)
         if path not in self.files:
             if readonly:
                 return _NullScopeInfo()
@@ -152,6 +290,9 @@ class ScopeInfo(object):
     def add_call(self, parameters, returned):
         pass
 
+    def limit_calls(self, count):
+        """Forget least recently added calls if there are more than `count`"""
+
 
 class CallInfo(object):
 
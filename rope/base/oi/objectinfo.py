@@ -1,22 +1,34 @@
+import threading
 import warnings
 
-from rope.base import exceptions, resourceobserver
-from rope.base.oi import objectdb, memorydb, transform
+from rope.base import exceptions, resourceobserver, utils
+from rope.base.oi import objectdb, memorydb, sqlitedb, transform
 
 
 class ObjectInfoManager(object):
     """Stores object information
 
     It uses an instance of `objectdb.ObjectDB` for storing
-    information.
+    information.  Its public methods hold `lock`, which DOA threads
+    acquire before updating the information.  `lock` is usually the
+    lock of `rope.base.pycore.PyCore`.  `generation` is a function
+    that returns the generation of `PyCore`; if given, it is used for
+    remembering the results of textual transforms.
 
     """
 
-    def __init__(self, project):
+    def __init__(self, project, lock=None, generation=None):
         self.project = project
-        self.to_textual = transform.PyObjectToTextual(project)
-        self.to_pyobject = transform.TextualToPyObject(project)
-        self.doi_to_pyobject = transform.DOITextualToPyObject(project)
+        if lock is None:
+            lock = threading.RLock()
+        self.lock = lock
+        self.to_textual = transform.PyObjectToTextual(
+            project, generation=generation)
+        self.to_pyobject = transform.TextualToPyObject(
+            project, generation=generation)
+        self.doi_to_pyobject = transform.DOITextualToPyObject(
+            project, generation=generation)
+        self.changed_files = set()
         self._init_objectdb()
         if project.prefs.get('validate_objectdb', False):
             self._init_validation()
@@ -33,24 +45,50 @@ class ObjectInfoManager(object):
             if dbtype != 'memory' and self.project.ropefolder is not None:
                 persist = True
         self.validation = TextualValidation(self.to_pyobject)
-        db = memorydb.MemoryDB(self.project, persist=persist)
-        self.objectdb = objectdb.ObjectDB(db, self.validation)
+        storage = self.project.prefs.get('objectdb_storage', 'pickle')
+        if storage == 'sqlite' and sqlitedb.is_available():
+            db = sqlitedb.SQLiteDB(self.project, persist=persist)
+        else:
+            db = memorydb.MemoryDB(self.project, persist=persist)
+        self.objectdb = objectdb.ObjectDB(
+            db, self.validation, self.project.prefs.get('max_objectdb_calls'))
 
     def _init_validation(self):
-        self.objectdb.validate_files()
+        # files are validated and observed when they are first used
+        self.objectdb.validate_files_lazily(self.project.prefs.get(
+            'validate_objectdb_in_background', False))
         observer = resourceobserver.ResourceObserver(
             changed=self._resource_changed, moved=self._resource_moved,
             removed=self._resource_moved)
-        files = []
-        for path in self.objectdb.get_files():
-            resource = self.to_pyobject.path_to_resource(path)
-            if resource is not None and resource.project == self.project:
-                files.append(resource)
-        self.observer = resourceobserver.FilteredResourceObserver(observer,
-                                                                  files)
+        self.observer = resourceobserver.FilteredResourceObserver(observer)
         self.objectdb.add_file_list_observer(_FileListObserver(self))
         self.project.add_observer(self.observer)
-
+        self.project.add_observer(resourceobserver.ResourceObserver(
+            changed=self._unchecked_resource_changed,
+            moved=self._unchecked_resource_moved))
+
+    @utils.locked
+    def _unchecked_resource_changed(self, resource):
+        """Validate changed files that are not observed yet"""
+        path = self.to_textual.resource_to_path(resource)
+        if not self.objectdb.is_checked(path):
+            self.objectdb.check_file(path)
+            self._resource_changed(resource)
+
+    @utils.locked
+    def _unchecked_resource_moved(self, resource, new_resource):
+        """Update the paths of moved files that are not observed yet"""
+        old = self.to_textual.resource_to_path(resource)
+        new = self.to_textual.resource_to_path(new_resource)
+        if not new_resource.is_folder():
+            if not self.objectdb.is_checked(old):
+                self.objectdb.file_moved(old, new)
+            return
+        for path in self.objectdb.get_unchecked_files():
+            if path.startswith(old + '/'):
+                self.objectdb.file_moved(path, new + path[len(old):])
+
+    @utils.locked
     def _resource_changed(self, resource):
         try:
             self.objectdb.validate_file(
@@ -58,6 +96,7 @@ class ObjectInfoManager(object):
         except exceptions.ModuleSyntaxError:
             pass
 
+    @utils.locked
     def _resource_moved(self, resource, new_resource=None):
         self.observer.remove_resource(resource)
         if new_resource is not None:
@@ -66,6 +105,7 @@ class ObjectInfoManager(object):
             self.objectdb.file_moved(old, new)
             self.observer.add_resource(new_resource)
 
+    @utils.locked
     def get_returned(self, pyobject, args):
         result = self.get_exact_returned(pyobject, args)
         if result is not None:
@@ -81,15 +121,16 @@ class ObjectInfoManager(object):
             if result is None:
                 result = returned
         if result is not None:
-            return self.to_pyobject(result)
+            return self._to_pyobject(pyobject, result)
 
+    @utils.locked
     def get_exact_returned(self, pyobject, args):
         path, key = self._get_scope(pyobject)
         if path is not None:
             returned = self.objectdb.get_returned(
                 path, key, self._args_to_textual(pyobject, args))
             if returned is not None:
-                return self.to_pyobject(returned)
+                return self._to_pyobject(pyobject, returned)
 
     def _args_to_textual(self, pyfunction, args):
         parameters = list(pyfunction.get_param_names(special_args=False))
@@ -98,6 +139,7 @@ class ObjectInfoManager(object):
                               for arg in arguments])
         return textual_args
 
+    @utils.locked
     def get_parameter_objects(self, pyobject):
         path, key = self._get_scope(pyobject)
         if path is None:
@@ -116,9 +158,10 @@ class ObjectInfoManager(object):
             if unknowns == 0:
                 break
         if unknowns < arg_count:
-            return [self.to_pyobject(parameter)
+            return [self._to_pyobject(pyobject, parameter)
                     for parameter in parameters]
 
+    @utils.locked
     def get_passed_objects(self, pyfunction, parameter_index):
         path, key = self._get_scope(pyfunction)
         if path is None:
@@ -127,11 +170,13 @@ class ObjectInfoManager(object):
         for call_info in self.objectdb.get_callinfos(path, key):
             args = call_info.get_parameters()
             if len(args) > parameter_index:
-                parameter = self.to_pyobject(args[parameter_index])
+                parameter = self._to_pyobject(pyfunction,
+                                              args[parameter_index])
                 if parameter is not None:
                     result.append(parameter)
         return result
 
+    @utils.locked
     def doa_data_received(self, data):
         def doi_to_normal(textual):
             pyobject = self.doi_to_pyobject(textual)
@@ -142,6 +187,18 @@ class ObjectInfoManager(object):
         if function[0] == 'defined' and len(function) == 3:
             self._save_data(function, args, returned)
 
+    @utils.locked
+    def apply_delta(self, delta):
+        """Add the information in an `objectdb.ObjectDB` delta
+
+        Returns the changes that were accepted.
+        """
+        accepted = self.objectdb.apply_delta(delta)
+        for change in accepted:
+            self.changed_files.add(change[1])
+        return accepted
+
+    @utils.locked
     def function_called(self, pyfunction, params, returned=None):
         function_text = self.to_textual(pyfunction)
         params_text = tuple([self.to_textual(param)
@@ -151,20 +208,50 @@ class ObjectInfoManager(object):
             returned_text = self.to_textual(returned)
         self._save_data(function_text, params_text, returned_text)
 
+    @utils.locked
     def save_per_name(self, scope, name, data):
         path, key = self._get_scope(scope.pyobject)
         if path is not None:
             self.objectdb.add_pername(path, key, name, self.to_textual(data))
+            self.changed_files.add(path)
 
+    @utils.locked
     def get_per_name(self, scope, name):
         path, key = self._get_scope(scope.pyobject)
         if path is not None:
             result = self.objectdb.get_pername(path, key, name)
             if result is not None:
-                return self.to_pyobject(result)
+                return self._to_pyobject(scope.pyobject, result)
+
+    @utils.locked
+    def pop_changed_files(self):
+        """Return and clear the resources whose information has changed
+
+        It can be used for forgetting the data inferred from the old
+        information.
+
+        """
+        result = []
+        for path in self.changed_files:
+            resource = self.to_pyobject.path_to_resource(path)
+            if resource is not None:
+                result.append(resource)
+        self.changed_files.clear()
+        return result
+
+    def _to_pyobject(self, pyobject, textual):
+        result = self.to_pyobject(textual)
+        if result is not None:
+            module_cache = self.project.pycore.module_cache
+            resource = pyobject.get_module().get_resource()
+            for path in _get_textual_paths(textual):
+                module_cache.add_dependency(
+                    resource, self.to_pyobject.path_to_resource(path))
+        return result
 
     def _save_data(self, function, args, returned=('unknown',)):
         self.objectdb.add_callinfo(function[1], function[2], args, returned)
+        self.changed_files.add(function[1])
 
     def _get_scope(self, pyobject):
         resource = pyobject.get_module().get_resource()
@@ -181,7 +268,7 @@ class ObjectInfoManager(object):
         return None, None
 
     def sync(self):
-        self.objectdb.sync()
+        self.objectdb.write()
 
     def __str__(self):
         return str(self.objectdb)
@@ -206,6 +293,10 @@ class TextualValidation(object):
     def is_file_valid(self, path):
         return self.to_pyobject.path_to_resource(path) is not None
 
+    def is_file_valid_in_thread(self, path):
+        """Like `is_file_valid()` but safe to call in other threads"""
+        return self.to_pyobject.find_resource(path) is not None
+
     def is_scope_valid(self, path, key):
         if key == '':
             textual = ('defined', path)
@@ -214,6 +305,15 @@ class TextualValidation(object):
         return self.to_pyobject(textual) is not None
 
 
+def _get_textual_paths(textual):
+    if textual[0] == 'defined':
+        yield textual[1]
+    for part in textual[1:]:
+        if isinstance(part, tuple):
+            for path in _get_textual_paths(part):
+                yield path
+
+
 class _FileListObserver(object):
 
     def __init__(self, object_info):
@@ -228,5 +328,6 @@ class _FileListObserver(object):
 
     def added(self, path):
         resource = self.to_pyobject.path_to_resource(path)
-        if resource is not None:
+        if resource is not None and resource.project == \
+           self.object_info.project:
             self.observer.add_resource(resource)
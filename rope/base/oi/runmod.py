@@ -8,6 +8,7 @@ def __rope_start_everything():
     import inspect
     import types
     import threading
+    import time
 
     class _MessageSender(object):
 
@@ -59,7 +60,9 @@ def __rope_start_everything():
                 self.sender = _SocketSender(int(send_info))
             else:
                 self.sender = _FileSender(send_info)
+            self._start_tracing()
 
+        def _start_tracing(self):
             def global_trace(frame, event, arg):
                 # HACK: Ignoring out->in calls
                 # This might lose some information
@@ -71,6 +74,12 @@ def __rope_start_everything():
         def on_function_call(self, frame, event, arg):
             if event != 'return':
                 return
+            data = self._get_call_data(frame, arg)
+            if data is not None:
+                self.sender.send_data(data)
+            return self.on_function_call
+
+        def _get_call_data(self, frame, arg):
             args = []
             returned = ('unknown',)
             code = frame.f_code
@@ -84,12 +93,10 @@ def __rope_start_everything():
             except (TypeError, AttributeError):
                 pass
             try:
-                data = (self._object_to_persisted_form(frame.f_code),
+                return (self._object_to_persisted_form(frame.f_code),
                         tuple(args), returned)
-                self.sender.send_data(data)
             except (TypeError):
                 pass
-            return self.on_function_call
 
         def _is_an_interesting_call(self, frame):
             #if frame.f_code.co_name in ['?', '<module>']:
@@ -189,22 +196,141 @@ def __rope_start_everything():
             self.sender.close()
             sys.settrace(None)
 
+    class _BatchingDataSender(_FunctionCallDataSender):
+        """Records each distinct call once and sends them in batches
+
+        Calls are noticed with a profile function, which unlike trace
+        functions is not called for every line.  A call is recorded
+        only if the types of its arguments and returned object differ
+        from the calls recorded for the same function.  At most
+        `max_samples` calls are recorded for each function and after
+        examining ``16 * max_samples`` calls of a function its calls
+        are ignored.
+
+        """
+
+        def __init__(self, send_info, project_root, max_samples,
+                     interval=1.0):
+            self.max_samples = max_samples
+            self.max_examined = 16 * max_samples
+            self.interval = interval
+            self.samples = {}
+            self.inside_project = {}
+            self.calls = []
+            self.last_flush = time.time()
+            self.lock = threading.Lock()
+            super(_BatchingDataSender, self).__init__(send_info, project_root)
+
+        def _start_tracing(self):
+            sys.setprofile(self.on_event)
+            threading.setprofile(self.on_event)
+
+        def on_event(self, frame, event, arg):
+            if event != 'return':
+                return
+            code = frame.f_code
+            examined = self.samples.get(code)
+            if examined is None:
+                examined = self.samples[code] = [0, set()]
+            if examined[0] >= self.max_examined or \
+               len(examined[1]) >= self.max_samples or \
+               not self._is_an_interesting_call(frame):
+                return
+            examined[0] += 1
+            samples = examined[1]
+            try:
+                names = code.co_varnames[:code.co_argcount]
+                key = (tuple([self._get_type_key(frame.f_locals[name])
+                              for name in names]),
+                       self._get_type_key(arg))
+                if key in samples:
+                    return
+                samples.add(key)
+            except (TypeError, KeyError):
+                pass
+            data = self._get_call_data(frame, arg)
+            if data is not None:
+                # other threads might be flushing the calls
+                self.lock.acquire()
+                try:
+                    self.calls.append(data)
+                    due = time.time() - self.last_flush >= self.interval
+                finally:
+                    self.lock.release()
+                if due:
+                    self.flush()
+
+        def _is_code_inside_project(self, code):
+            if code not in self.inside_project:
+                self.inside_project[code] = super(
+                    _BatchingDataSender, self)._is_code_inside_project(code)
+            return self.inside_project[code]
+
+        def _get_type_key(self, object_, depth=0):
+            """Return a key that is the same for objects of the same type"""
+            if isinstance(object_, (types.TypeType, types.ClassType,
+                                    types.FunctionType, types.ModuleType,
+                                    types.CodeType)):
+                return object_
+            if isinstance(object_, types.MethodType):
+                return object_.im_func
+            if depth < 2 and isinstance(object_, (list, tuple, set, dict)):
+                holdings = ()
+                if isinstance(object_, dict):
+                    for key, value in object_.iteritems():
+                        holdings = (key, value)
+                        break
+                elif isinstance(object_, tuple) and len(object_) < 3:
+                    holdings = object_
+                else:
+                    for holding in object_:
+                        holdings = (holding,)
+                        break
+                return (type(object_),) + tuple(
+                    [self._get_type_key(holding, depth + 1)
+                     for holding in holdings])
+            return getattr(object_, '__class__', type(object_))
+
+        def flush(self):
+            self.lock.acquire()
+            try:
+                calls = self.calls
+                self.calls = []
+                self.last_flush = time.time()
+                if calls:
+                    self.sender.send_data(calls)
+            finally:
+                self.lock.release()
+
+        def close(self):
+            sys.setprofile(None)
+            threading.setprofile(None)
+            self.flush()
+            self.sender.close()
+
     def _realpath(path):
         return os.path.realpath(os.path.abspath(os.path.expanduser(path)))
 
     send_info = sys.argv[1]
-    project_root = sys.argv[2]
-    file_to_run = sys.argv[3]
+    max_samples = int(sys.argv[2])
+    project_root = sys.argv[3]
+    file_to_run = sys.argv[4]
     run_globals = globals()
     run_globals.update({'__name__': '__main__',
                         '__builtins__': __builtins__,
                         '__file__': file_to_run})
     if send_info != '-':
-        data_sender = _FunctionCallDataSender(send_info, project_root)
-    del sys.argv[1:4]
-    execfile(file_to_run, run_globals)
-    if send_info != '-':
-        data_sender.close()
+        if max_samples > 0:
+            data_sender = _BatchingDataSender(send_info, project_root,
+                                              max_samples)
+        else:
+            data_sender = _FunctionCallDataSender(send_info, project_root)
+    del sys.argv[1:5]
+    try:
+        execfile(file_to_run, run_globals)
+    finally:
+        if send_info != '-':
+            data_sender.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,254 @@
+"""An object DB stored in an SQLite database
+
+Unlike `rope.base.oi.memorydb.MemoryDB` that reads and writes the
+whole DB at once, `SQLiteDB` loads the information of each scope the
+first time it is needed and writes only the scopes that have changed.
+It is used when ``objectdb_storage`` project config is ``'sqlite'``.
+
+"""
+import cPickle as pickle
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from rope.base.oi import objectdb, memorydb
+
+
+def is_available():
+    return sqlite3 is not None
+
+
+class SQLiteDB(objectdb.FileDict):
+    """An object DB stored in an SQLite database
+
+    Statements are committed as soon as they are executed and changed
+    scopes are written in one short transaction, so that other
+    connections to the same file, like those of other rope processes,
+    are not blocked for long; they wait up to `timeout` seconds for
+    the database to be unlocked.
+
+    """
+
+    timeout = 30.0
+
+    def __init__(self, project, persist=None):
+        self.project = project
+        self._persist = persist
+        self.files = self
+        self.scopes = {}
+        self._connection = None
+        # DOA information is analyzed in other threads
+        self._lock = threading.RLock()
+        self.project.data_files.add_write_hook(self.write)
+
+    @property
+    def connection(self):
+        # connecting when first needed; the ropefolder might not
+        # exist yet when the project is being opened
+        if self._connection is None:
+            self._connect()
+        return self._connection
+
+    def _connect(self):
+        path = ':memory:'
+        exists = False
+        if self.persist and self.project.ropefolder is not None:
+            file = self.project.get_file(
+                self.project.ropefolder.path + '/objectdb.sqlite')
+            exists = file.exists()
+            path = file.real_path
+        # `isolation_level=None` commits each statement when executed
+        self._connection = sqlite3.connect(
+            path, timeout=self.timeout, isolation_level=None,
+            check_same_thread=False)
+        self._connection.text_factory = str
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY)')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS scopes (path TEXT, key TEXT, '
+            'data BLOB, PRIMARY KEY (path, key))')
+        if self.persist and not exists:
+            self._in_transaction(self._import_memorydb)
+
+    def _import_memorydb(self):
+        """Copy the information saved by `memorydb.MemoryDB`"""
+        old_files = memorydb.MemoryDB(self.project, persist=True)
+        for path in old_files.keys():
+            self.create(path)
+            file_info = old_files[path]
+            for key in file_info.keys():
+                scope = ScopeInfo(path, key)
+                scope.__setstate__(file_info[key].__getstate__())
+                scope.dirty = True
+                self.scopes[(path, key)] = scope
+        self.project.data_files.hooks.remove(old_files.write)
+
+    def keys(self):
+        return [row[0] for row in self._execute('SELECT path FROM files')]
+
+    def __contains__(self, path):
+        return self._exists('SELECT 1 FROM files WHERE path = ?', (path,))
+
+    def __getitem__(self, path):
+        if path not in self:
+            raise KeyError(path)
+        return FileInfo(self, path)
+
+    def create(self, path):
+        self._execute('INSERT OR IGNORE INTO files (path) VALUES (?)', (path,))
+
+    def rename(self, file, newfile):
+        if file not in self:
+            return
+        del self[newfile]
+        self._in_transaction(self._rename, file, newfile)
+        for path, key in list(self.scopes):
+            if path == file:
+                scope = self.scopes.pop((path, key))
+                scope.path = newfile
+                self.scopes[(newfile, key)] = scope
+
+    def _rename(self, file, newfile):
+        self._execute('UPDATE files SET path = ? WHERE path = ?',
+                      (newfile, file))
+        self._execute('UPDATE scopes SET path = ? WHERE path = ?',
+                      (newfile, file))
+
+    def __delitem__(self, file):
+        self._in_transaction(self._delete, file)
+        for path, key in list(self.scopes):
+            if path == file:
+                del self.scopes[(path, key)]
+
+    def _delete(self, file):
+        self._execute('DELETE FROM files WHERE path = ?', (file,))
+        self._execute('DELETE FROM scopes WHERE path = ?', (file,))
+
+    def write(self):
+        """Write changed scopes
+
+        The connection to a saved DB is closed; it is opened again
+        when needed.
+
+        """
+        self._lock.acquire()
+        try:
+            dirty = [scope for scope in self.scopes.values() if scope.dirty]
+            if self._connection is None and not dirty:
+                return
+            self._in_transaction(self._write_scopes, dirty)
+            if self.persist:
+                self._connection.close()
+                self._connection = None
+        finally:
+            self._lock.release()
+
+    def _write_scopes(self, scopes):
+        for scope in scopes:
+            self._execute(
+                'INSERT OR REPLACE INTO scopes (path, key, data) '
+                'VALUES (?, ?, ?)', (scope.path, scope.key,
+                                     _dumps(scope.__getstate__())))
+            scope.dirty = False
+
+    def _in_transaction(self, function, *args):
+        """Call `function` in a transaction holding the lock"""
+        self._lock.acquire()
+        try:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                function(*args)
+            except:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+        finally:
+            self._lock.release()
+
+    def _get_scope(self, path, key):
+        if (path, key) not in self.scopes:
+            rows = self._execute(
+                'SELECT data FROM scopes WHERE path = ? AND key = ?',
+                (path, key))
+            if not rows:
+                raise KeyError(key)
+            scope = ScopeInfo(path, key)
+            scope.__setstate__(pickle.loads(str(rows[0][0])))
+            self.scopes[(path, key)] = scope
+        return self.scopes[(path, key)]
+
+    def _exists(self, query, args):
+        return len(self._execute(query, args)) > 0
+
+    def _execute(self, query, args=()):
+        """Execute `query` and return the resulting rows"""
+        self._lock.acquire()
+        try:
+            return self.connection.execute(query, args).fetchall()
+        finally:
+            self._lock.release()
+
+    @property
+    def persist(self):
+        if self._persist is not None:
+            return self._persist
+        else:
+            return self.project.prefs.get('save_objectdb', False)
+
+
+class FileInfo(objectdb.FileInfo):
+
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def create_scope(self, key):
+        scope = ScopeInfo(self.path, key)
+        scope.dirty = True
+        self.db.scopes[(self.path, key)] = scope
+
+    def keys(self):
+        result = set(row[0] for row in self.db._execute(
+            'SELECT key FROM scopes WHERE path = ?', (self.path,)))
+        for path, key in self.db.scopes:
+            if path == self.path:
+                result.add(key)
+        return list(result)
+
+    def __contains__(self, key):
+        return (self.path, key) in self.db.scopes or self.db._exists(
+            'SELECT 1 FROM scopes WHERE path = ? AND key = ?',
+            (self.path, key))
+
+    def __getitem__(self, key):
+        return self.db._get_scope(self.path, key)
+
+    def __delitem__(self, key):
+        self.db._execute(
+            'DELETE FROM scopes WHERE path = ? AND key = ?', (self.path, key))
+        self.db.scopes.pop((self.path, key), None)
+
+
+class ScopeInfo(memorydb.ScopeInfo):
+    """A `memorydb.ScopeInfo` that knows whether it has changed"""
+
+    def __init__(self, path, key):
+        super(ScopeInfo, self).__init__()
+        self.path = path
+        self.key = key
+        self.dirty = False
+
+    def save_per_name(self, name, value):
+        super(ScopeInfo, self).save_per_name(name, value)
+        self.dirty = True
+
+    def add_call(self, parameters, returned):
+        super(ScopeInfo, self).add_call(parameters, returned)
+        self.dirty = True
+
+
+def _dumps(data):
+    return sqlite3.Binary(pickle.dumps(data, 2))
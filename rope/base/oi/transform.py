@@ -6,21 +6,62 @@ import rope.base.builtins
 from rope.base import exceptions
 
 
+class _Memo(object):
+    """Remembers the results of transforms
+
+    `generation` is a function that returns the generation of
+    `rope.base.pycore.PyCore`; the results are forgotten whenever it
+    changes, that is when a resource of the project is changed,
+    created, moved or removed, or when there are `max_results` of
+    them.  If `generation` is `None` nothing is remembered.
+
+    """
+
+    max_results = 4096
+
+    def __init__(self, generation=None):
+        self.get_generation = generation
+        self.generation = None
+        self.results = {}
+
+    def get_results(self):
+        if self.get_generation is None:
+            return {}
+        generation = self.get_generation()
+        if generation != self.generation or \
+           len(self.results) >= self.max_results:
+            self.results = {}
+            self.generation = generation
+        return self.results
+
+
 class PyObjectToTextual(object):
     """For transforming `PyObject` to textual form
 
     This can be used for storing `PyObjects` in files.  Use
-    `TextualToPyObject` for converting back.
+    `TextualToPyObject` for converting back.  If `generation` is
+    given, the results are remembered; see `_Memo`.
 
     """
 
-    def __init__(self, project):
+    def __init__(self, project, generation=None):
         self.project = project
+        self.memo = _Memo(generation)
 
     def transform(self, pyobject):
         """Transform a `PyObject` to textual form"""
         if pyobject is None:
             return ('none',)
+        if isinstance(pyobject, rope.base.pyobjects.PyDefinedObject) and \
+           pyobject.get_module().get_resource() is not None:
+            # objects of string modules are not remembered
+            results = self.memo.get_results()
+            if pyobject not in results:
+                results[pyobject] = self._transform(pyobject)
+            return results[pyobject]
+        return self._transform(pyobject)
+
+    def _transform(self, pyobject):
         object_type = type(pyobject)
         try:
             method = getattr(self, object_type.__name__ + '_to_textual')
@@ -100,10 +141,18 @@ class PyObjectToTextual(object):
 
 
 class TextualToPyObject(object):
-    """For transforming textual form to `PyObject`"""
+    """For transforming textual form to `PyObject`
 
-    def __init__(self, project, allow_in_project_absolutes=False):
+    If `generation` is given, the results are remembered; see
+    `_Memo`.
+
+    """
+
+    def __init__(self, project, allow_in_project_absolutes=False,
+                 generation=None):
         self.project = project
+        self.memo = _Memo(generation)
+        self.path_memo = _Memo(generation)
 
     def __call__(self, textual):
         return self.transform(textual)
@@ -112,6 +161,17 @@ class TextualToPyObject(object):
         """Transform an object from textual form to `PyObject`"""
         if textual is None:
             return None
+        results = self.memo.get_results()
+        try:
+            return results[textual]
+        except KeyError:
+            result = results[textual] = self._transform(textual)
+            return result
+        except TypeError:
+            # unhashable textual forms
+            return self._transform(textual)
+
+    def _transform(self, textual):
         type = textual[0]
         try:
             method = getattr(self, type + '_to_pyobject')
@@ -206,6 +266,18 @@ class TextualToPyObject(object):
             return self.project.pycore.resource_to_pyobject(resource)
 
     def path_to_resource(self, path):
+        results = self.path_memo.get_results()
+        if path not in results:
+            results[path] = self.find_resource(path)
+        return results[path]
+
+    def find_resource(self, path):
+        """Return the resource of `path` without using the memo
+
+        Unlike `path_to_resource()`, it does not use `PyCore` and can
+        be called from other threads.
+
+        """
         try:
             root = self.project.address
             if not os.path.isabs(path):
@@ -0,0 +1,95 @@
+"""Performing project-wide tasks in worker processes
+
+Each worker process opens its own `rope.base.project.Project` on the
+root folder of the parent project.  Note that workers see the files
+as they are on disk; the information of the object DB of the parent
+project is not available to them.  Their object DBs are kept in
+memory and never saved, so that workers do not write to or lock the
+DB of the parent project; they should return what they find instead.
+
+"""
+import cPickle as pickle
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+import rope.base.project
+
+
+def is_available():
+    """Return `True` if tasks can be performed in worker processes"""
+    return multiprocessing is not None
+
+
+def can_pass(obj):
+    """Return `True` if `obj` can be passed to worker processes"""
+    try:
+        pickle.dumps(obj, 2)
+        return True
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+
+
+def split(items, count):
+    """Split `items` into at most `count` lists of consecutive items"""
+    items = list(items)
+    size = max(1, (len(items) + count - 1) // max(1, count))
+    return [items[index:index + size]
+            for index in range(0, len(items), size)]
+
+
+def imap(project, function, tasks, processes=None, setup=None):
+    """Yield ``function(worker_project, *task)`` for each of `tasks`
+
+    `function` should be a module-level function and `tasks` a list
+    of tuples that can be pickled.  The results are generated in the
+    order of `tasks`.  If `processes` is `None` as many workers as
+    CPUs are used.  The worker processes are terminated when the
+    returned generator is closed, for instance when the task is
+    interrupted while consuming the results.
+
+    If `setup` is not `None`, it should be a ``(function, args)``
+    tuple; ``function(worker_project, *args)`` is called once in each
+    worker before its tasks.  Use it for passing the data every task
+    needs.
+
+    """
+    pool = multiprocessing.Pool(processes, _init_worker,
+                                (_get_project_args(project), setup))
+    try:
+        calls = [(function, task) for task in tasks]
+        for result in pool.imap(_call_in_worker, calls):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _get_project_args(project):
+    prefs = dict(project.prefs.prefs)
+    prefs['ignored_resources'] = project.ignored.patterns
+    # workers should not use the saved object DB of the parent
+    prefs.pop('objectdb_type', None)
+    prefs['objectdb_storage'] = 'pickle'
+    prefs['save_objectdb'] = False
+    return (project.address, project._ropefolder_name, prefs)
+
+
+_worker_project = None
+
+def _init_worker(project_args, setup=None):
+    global _worker_project
+    address, ropefolder, prefs = project_args
+    _worker_project = rope.base.project.Project(
+        address, ropefolder=ropefolder, **prefs)
+    if setup is not None:
+        function, args = setup
+        function(_worker_project, *args)
+
+
+def _call_in_worker(call):
+    function, task = call
+    return function(_worker_project, *task)
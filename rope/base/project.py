@@ -1,6 +1,7 @@
 import cPickle as pickle
 import os
 import shutil
+import stat
 import sys
 import warnings
 
@@ -139,6 +140,10 @@ class Project(_Project):
             fscommands = rope.base.fscommands.create_fscommands(self._address)
         super(Project, self).__init__(fscommands)
         self.ignored = _ResourceMatcher()
+        callback = self.ignored.forget_links
+        self.add_observer(ResourceObserver(
+            created=callback, moved=callback, removed=callback,
+            validate=callback))
         self.file_list = _FileListCacher(self)
         self.prefs.add_callback('ignored_resources', self.ignored.set_patterns)
         if ropefolder is not None:
@@ -254,36 +259,126 @@ def get_no_project():
 
 
 class _FileListCacher(object):
+    """Caches the list of project files
+
+    The list is updated in place when resources are created, moved
+    or removed and is computed again only after validating the
+    project.
+
+    """
 
     def __init__(self, project):
         self.project = project
         self.files = None
+        self._shared = False
         rawobserver = ResourceObserver(
-            self._changed, self._invalid, self._invalid,
-            self._invalid, self._invalid)
+            self._changed, self._moved, self._created,
+            self._removed, self._invalid)
         self.project.add_observer(rawobserver)
 
     def get_files(self):
         if self.files is None:
             self.files = set()
             self._add_files(self.project.root)
+        self._shared = True
         return self.files
 
     def _add_files(self, folder):
-        for child in folder.get_children():
-            if child.is_folder():
-                self._add_files(child)
-            elif not self.project.is_ignored(child):
-                self.files.add(child)
+        self.files.update(_walk_files(self.project, folder))
+
+    def _remove_files(self, folder):
+        prefix = folder.path + '/'
+        for file in list(self.files):
+            if folder.path == '' or file.path.startswith(prefix):
+                self.files.remove(file)
+
+    def _prepare_update(self):
+        """Return `False` if the cached list should not be updated"""
+        if self.files is None:
+            return False
+        if self._shared:
+            # do not change the set already returned from `get_files()`
+            self.files = set(self.files)
+            self._shared = False
+        return True
 
     def _changed(self, resource):
+        if resource.is_folder() and self._prepare_update():
+            self._remove_files(resource)
+            if resource.exists() and not self.project.is_ignored(resource):
+                self._add_files(resource)
+
+    def _created(self, resource):
+        if not self._prepare_update() or not resource.exists() or \
+           self.project.is_ignored(resource):
+            return
         if resource.is_folder():
-            self.files = None
+            self._add_files(resource)
+        else:
+            self.files.add(resource)
+
+    def _removed(self, resource):
+        if self._prepare_update():
+            if resource.is_folder():
+                self._remove_files(resource)
+            else:
+                self.files.discard(resource)
+
+    def _moved(self, resource, new_resource):
+        self._removed(resource)
+        self._created(new_resource)
 
-    def _invalid(self, resource, new_resource=None):
+    def _invalid(self, resource):
         self.files = None
 
 
+def _walk_files(project, folder):
+    """Yield the files in `folder` that are not ignored
+
+    Ignored folders are not descended into.  Each entry is checked
+    with a single ``os.lstat()`` call, or an ``os.stat()`` call more
+    for symbolic links.  Like `Project.is_ignored()`,
+    symbolic links to files are skipped; symbolic links to folders
+    are descended into, but each target folder only once.
+
+    """
+    folders = [folder.path]
+    # the targets of the linked folders descended into
+    targets = set()
+    while folders:
+        path = folders.pop()
+        real_path = project._get_resource_path(path)
+        try:
+            names = os.listdir(real_path)
+        except OSError:
+            continue
+        prefix = path and path + '/'
+        modes = {}
+        links = set()
+        for name in names:
+            child_path = os.path.join(real_path, name)
+            try:
+                mode = os.lstat(child_path).st_mode
+                if stat.S_ISLNK(mode):
+                    mode = os.stat(child_path).st_mode
+                    if not stat.S_ISDIR(mode):
+                        links.add(prefix + name)
+                    else:
+                        target = os.path.realpath(child_path)
+                        if target in targets:
+                            continue
+                        targets.add(target)
+            except OSError:
+                continue
+            modes[prefix + name] = mode
+        for child in project.ignored.filter(modes, links):
+            mode = modes[child]
+            if stat.S_ISDIR(mode):
+                folders.append(child)
+            elif stat.S_ISREG(mode):
+                yield File(project, child)
+
+
 class _DataFiles(object):
 
     def __init__(self, project):
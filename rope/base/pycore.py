@@ -1,12 +1,14 @@
 import bisect
 import difflib
+import hashlib
 import sys
+import threading
 import warnings
 
 import rope.base.oi.doa
 import rope.base.oi.objectinfo
 import rope.base.oi.soa
-from rope.base import ast, exceptions, taskhandle, utils, stdmods
+from rope.base import ast, exceptions, taskhandle, utils, stdmods, nameindex
 from rope.base.exceptions import ModuleNotFoundError
 from rope.base.pyobjectsdef import PyModule, PyPackage, PyClass
 import rope.base.resources
@@ -15,17 +17,27 @@ from rope.base import builtins
 
 
 class PyCore(object):
+    """Creates and caches `PyModule`\s
+
+    DOA threads analyze the information they receive holding `lock`.
+    The methods that create modules or change the caches hold it, too.
+
+    """
 
     def __init__(self, project):
         self.project = project
+        self.lock = threading.RLock()
+        self._init_generation()
         self._init_resource_observer()
         self.cache_observers = []
         self.module_cache = _ModuleCache(self)
         self.extension_cache = _ExtensionCache(self)
-        self.object_info = rope.base.oi.objectinfo.ObjectInfoManager(project)
+        self.object_info = rope.base.oi.objectinfo.ObjectInfoManager(
+            project, self.lock, generation=lambda: self.generation)
         self._init_python_files()
         self._init_automatic_soa()
         self._init_source_folders()
+        self._init_module_names()
 
     def _init_python_files(self):
         self.python_matcher = None
@@ -33,6 +45,24 @@ class PyCore(object):
         if patterns is not None:
             self.python_matcher = rope.base.resources._ResourceMatcher()
             self.python_matcher.set_patterns(patterns)
+            callback = self.python_matcher.forget_links
+            observer = rope.base.resourceobserver.ResourceObserver(
+                created=callback, moved=callback, removed=callback,
+                validate=callback)
+            self.project.add_observer(observer)
+
+    def _init_generation(self):
+        # registered before other observers so that they do not see
+        # the old generation when they are notified
+        self.generation = 0
+        callback = self._next_generation
+        observer = rope.base.resourceobserver.ResourceObserver(
+            changed=callback, moved=callback, created=callback,
+            removed=callback, validate=callback)
+        self.project.add_observer(observer)
+
+    def _next_generation(self, resource, new_resource=None):
+        self.generation += 1
 
     def _init_resource_observer(self):
         callback = self._invalidate_resource_cache
@@ -47,6 +77,22 @@ class PyCore(object):
             folder = self.project.get_resource(path)
             self._custom_source_folders.append(folder)
 
+    def _init_module_names(self):
+        self._found_modules = {}
+        self._source_folders = None
+        self._python_path_folders = None
+        callback = self._invalidate_module_names
+        observer = rope.base.resourceobserver.ResourceObserver(
+            moved=callback, created=callback, removed=callback,
+            validate=callback)
+        self.project.add_observer(observer)
+
+    @utils.locked
+    def _invalidate_module_names(self, resource, new_resource=None):
+        self._found_modules.clear()
+        self._source_folders = None
+        self._python_path_folders = None
+
     def _init_automatic_soa(self):
         if not self.automatic_soa:
             return
@@ -73,6 +119,7 @@ class PyCore(object):
             return resource.name.endswith('.py')
         return self.python_matcher.does_match(resource)
 
+    @utils.locked
     def get_module(self, name, folder=None):
         """Returns a `PyObject` if the module was found."""
         # check if this is a builtin module
@@ -96,12 +143,14 @@ class PyCore(object):
     def _builtin_module(self, name):
         return self.extension_cache.get_pymodule(name)
 
+    @utils.locked
     def get_relative_module(self, name, folder, level):
         module = self.find_relative_module(name, folder, level)
         if module is None:
             raise ModuleNotFoundError('Module %s not found' % name)
         return self.resource_to_pyobject(module)
 
+    @utils.locked
     def get_string_module(self, code, resource=None, force_errors=False):
         """Returns a `PyObject` object for the given code
 
@@ -116,6 +165,7 @@ class PyCore(object):
         """Returns a `Scope` object for the given code"""
         return self.get_string_module(code, resource).get_scope()
 
+    @utils.locked
     def _invalidate_resource_cache(self, resource, new_resource=None):
         for observer in self.cache_observers:
             observer(resource)
@@ -137,22 +187,38 @@ class PyCore(object):
                 return module.get_child(packages[-1] + '.py')
 
     def get_python_path_folders(self):
+        return list(self._get_python_path_folders())
+
+    def _get_python_path_folders(self):
         import rope.base.project
+        paths = self.project.prefs.get('python_path', []) + sys.path
+        if self._python_path_folders is not None and \
+           self._python_path_folders[0] == paths:
+            return self._python_path_folders[1]
+        # the modules found using the old paths may be different now
+        self._found_modules.clear()
         result = []
-        for src in self.project.prefs.get('python_path', []) + sys.path:
+        for src in paths:
             try:
                 src_folder = rope.base.project.get_no_project().get_resource(src)
                 result.append(src_folder)
             except rope.base.exceptions.ResourceNotFoundError:
                 pass
+        self._python_path_folders = (paths, result)
         return result
 
+    @utils.locked
     def find_module(self, modname, folder=None):
         """Returns a resource corresponding to the given module
 
         returns None if it can not be found
         """
-        return self._find_module(modname, folder)
+        # forgets the found modules if python path has changed
+        self._get_python_path_folders()
+        key = (modname, folder)
+        if key not in self._found_modules:
+            self._found_modules[key] = self._find_module(modname, folder)
+        return self._found_modules[key]
 
     def find_relative_module(self, modname, folder, level):
         for i in range(level - 1):
@@ -168,7 +234,7 @@ class PyCore(object):
             module = self._find_module_in_folder(src, modname)
             if module is not None:
                 return module
-        for src in self.get_python_path_folders():
+        for src in self._get_python_path_folders():
             module = self._find_module_in_folder(src, modname)
             if module is not None:
                 return module
@@ -178,19 +244,20 @@ class PyCore(object):
                 return module
         return None
 
-    # INFO: It was decided not to cache source folders, since:
-    #  - Does not take much time when the root folder contains
-    #    packages, that is most of the time
-    #  - We need a separate resource observer; `self.observer`
-    #    does not get notified about module and folder creations
+    # INFO: Source folders and found modules are cached; they are
+    # invalidated whenever a resource is created, moved or removed
+    # or when the project is validated
     def get_source_folders(self):
         """Returns project source folders"""
         if self.project.root is None:
             return []
-        result = list(self._custom_source_folders)
-        result.extend(self._find_source_folders(self.project.root))
-        return result
+        if self._source_folders is None:
+            result = list(self._custom_source_folders)
+            result.extend(self._find_source_folders(self.project.root))
+            self._source_folders = result
+        return list(self._source_folders)
 
+    @utils.locked
     def resource_to_pyobject(self, resource, force_errors=False):
         return self.module_cache.get_pymodule(resource, force_errors)
 
@@ -219,11 +286,14 @@ class PyCore(object):
             result.extend(self._find_source_folders(resource))
         return result
 
-    def run_module(self, resource, args=None, stdin=None, stdout=None):
+    def run_module(self, resource, args=None, stdin=None, stdout=None,
+                   trace_file=None):
         """Run `resource` module
 
         Returns a `rope.base.oi.doa.PythonFileRunner` object for
-        controlling the process.
+        controlling the process.  If `trace_file` is not `None`, the
+        collected information is written to that file instead of being
+        analyzed; use `analyze_trace_files()` for analyzing it later.
 
         """
         perform_doa = self.project.prefs.get('perform_doi', True)
@@ -231,12 +301,66 @@ class PyCore(object):
         receiver = self.object_info.doa_data_received
         if not perform_doa:
             receiver = None
+            trace_file = None
         runner = rope.base.oi.doa.PythonFileRunner(
-            self, resource, args, stdin, stdout, receiver)
-        runner.add_finishing_observer(self.module_cache.forget_all_data)
+            self, resource, args, stdin, stdout, receiver,
+            lock=self.object_info.lock, trace_file=trace_file)
+        runner.add_finishing_observer(self._forget_changed_data)
         runner.run()
         return runner
 
+    def run_modules(self, runs, stdout=None, processes=None):
+        """Run modules in parallel processes
+
+        `runs` is a list of ``(resource, args)`` tuples.  Returns a
+        `rope.base.oi.doa.MultiFileRunner` object for controlling the
+        processes; see its docs for `processes`.  Like `run_module()`
+        the information collected in the processes is analyzed if
+        ``perform_doa`` project config is set.
+
+        """
+        perform_doa = self.project.prefs.get('perform_doi', True)
+        perform_doa = self.project.prefs.get('perform_doa', perform_doa)
+        receiver = self.object_info.doa_data_received
+        if not perform_doa:
+            receiver = None
+        runner = rope.base.oi.doa.MultiFileRunner(
+            self, runs, stdout, receiver, lock=self.object_info.lock,
+            processes=processes)
+        runner.add_finishing_observer(self._forget_changed_data)
+        runner.run()
+        return runner
+
+    def analyze_trace_files(self, paths,
+                            task_handle=taskhandle.NullTaskHandle()):
+        """Analyze the information collected in DOA trace files
+
+        `paths` are the paths of the files written by `run_module()`
+        or by ``rope/base/oi/runmod.py`` (see
+        `rope.base.oi.doa.read_trace_file()`).  The calls recorded in
+        more than one file are analyzed once.  Returns the
+        `rope.base.oi.doa.DataIngestor` used, which counts the
+        analyzed calls.
+
+        """
+        ingestor = rope.base.oi.doa.DataIngestor(
+            self.object_info.doa_data_received, self.object_info.lock)
+        job_set = task_handle.create_jobset('Analyzing trace files',
+                                            len(paths))
+        for path in paths:
+            job_set.started_job(path)
+            batch = []
+            for data in rope.base.oi.doa.read_trace_file(path):
+                batch.append(data)
+                if len(batch) >= ingestor.batch_size:
+                    ingestor.analyze_batch(batch)
+                    batch = []
+            ingestor.analyze_batch(batch)
+            job_set.finished_job()
+        self._forget_changed_data()
+        return ingestor
+
+    @utils.locked
     def analyze_module(self, resource, should_analyze=lambda py: True,
                        search_subscopes=lambda py: True, followed_calls=None):
         """Analyze `resource` module for static object inference
@@ -258,9 +382,15 @@ class PyCore(object):
         if followed_calls is None:
             followed_calls = self.project.prefs.get('soa_followed_calls', 0)
         pymodule = self.resource_to_pyobject(resource)
-        self.module_cache.forget_all_data()
+        self._forget_changed_data()
         rope.base.oi.soa.analyze_module(
             self, pymodule, should_analyze, search_subscopes, followed_calls)
+        self._forget_changed_data()
+
+    @utils.locked
+    def _forget_changed_data(self):
+        changed = self.object_info.pop_changed_files()
+        self.module_cache.forget_data(changed)
 
     def get_classes(self, task_handle=taskhandle.NullTaskHandle()):
         warnings.warn('`PyCore.get_classes()` is deprecated',
@@ -287,6 +417,12 @@ class PyCore(object):
             source_folder = source_folder.parent
         return module_name
 
+    @property
+    @utils.saveit
+    def name_index(self):
+        """A `rope.base.nameindex.NameIndex` for project files"""
+        return nameindex.NameIndex(self.project)
+
     @property
     @utils.cacheit
     def extension_modules(self):
@@ -301,15 +437,45 @@ class _ModuleCache(object):
     def __init__(self, pycore):
         self.pycore = pycore
         self.module_map = {}
+        self.dependents = {}
+        self.forgotten = 0
+        self.summaries = _ModuleSummaries(pycore.project)
         self.pycore.cache_observers.append(self._invalidate_resource)
         self.observer = self.pycore.observer
 
     def _invalidate_resource(self, resource):
         if resource in self.module_map:
-            self.forget_all_data()
+            self.forget_data([resource])
             self.observer.remove_resource(resource)
             del self.module_map[resource]
 
+    def add_dependency(self, resource, dependency):
+        """Record that the data of `resource` module uses `dependency`"""
+        if resource is None or dependency is None or resource == dependency:
+            return
+        if dependency not in self.dependents:
+            self.dependents[dependency] = set()
+        self.dependents[dependency].add(resource)
+
+    def forget_data(self, resources):
+        """Forget the concluded data of modules affected by `resources`
+
+        The data of `resources` and every module that depends on them,
+        directly or through other modules, is forgotten.
+
+        """
+        affected = set()
+        pending = list(resources)
+        while pending:
+            resource = pending.pop()
+            if resource not in affected:
+                affected.add(resource)
+                pending.extend(self.dependents.get(resource, ()))
+        for resource in affected:
+            if resource in self.module_map:
+                self.module_map[resource]._forget_concluded_data()
+                self.forgotten += 1
+
     def get_pymodule(self, resource, force_errors=False):
         if resource in self.module_map:
             return self.module_map[resource]
@@ -328,9 +494,145 @@ class _ModuleCache(object):
     def forget_all_data(self):
         for pymodule in self.module_map.values():
             pymodule._forget_concluded_data()
+        self.forgotten += len(self.module_map)
 
     def __str__(self):
-        return 'PyCore caches %d PyModules\n' % len(self.module_map)
+        return 'PyCore caches %d PyModules (%d forgotten so far)\n' % \
+               (len(self.module_map), self.forgotten)
+
+
+class ModuleSummary(object):
+    """The results of parsing a module
+
+    `error` is `None` or the ``(lineno, message)`` of the syntax error
+    of the module.  `imports` is a list of ``(modname, level, names)``
+    tuples for its global imports.  `modname` is `None` for relative
+    imports like ``from . import mod`` and `names` is `None` for
+    ``import modname`` statements.
+
+    """
+
+    def __init__(self, error=None, imports=()):
+        self.error = error
+        self.imports = list(imports)
+
+    def __getstate__(self):
+        return (self.error, self.imports)
+
+    def __setstate__(self, state):
+        self.error, self.imports = state
+
+
+class _ModuleSummaries(object):
+    """Keeps `ModuleSummary`\s keyed by the content hash of modules
+
+    It makes it possible to tell whether an unchanged module has
+    syntax errors and what it imports without parsing it.  If
+    ``save_module_summaries`` project config is `True` summaries are
+    kept across sessions.
+
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.summaries = {}
+        self._dirty = False
+        self._load_summaries()
+        self.project.data_files.add_write_hook(self.write)
+
+    def get(self, resource, source_bytes):
+        """Return the summary of `resource` if its contents is known"""
+        path = self._get_path(resource)
+        if path in self.summaries:
+            key, summary = self.summaries[path]
+            if key == _get_content_key(source_bytes):
+                return summary
+
+    def summarize(self, resource):
+        """Return the summary of `resource`, parsing it if needed
+
+        Unlike creating its `PyModule`, only the AST of the module is
+        built.
+
+        """
+        source_bytes = resource.read_bytes()
+        summary = self.get(resource, source_bytes)
+        if summary is None:
+            try:
+                node = ast.parse(source_bytes, resource.path)
+            except SyntaxError, e:
+                self.add_error(resource, source_bytes, e.lineno, e.msg)
+            else:
+                self.add(resource, source_bytes, node)
+            summary = self.get(resource, source_bytes)
+        return summary
+
+    def add(self, resource, source_bytes, ast_node):
+        summary = ModuleSummary(imports=_get_global_imports(ast_node.body))
+        self._set(resource, source_bytes, summary)
+
+    def add_error(self, resource, source_bytes, lineno, message):
+        self._set(resource, source_bytes,
+                  ModuleSummary(error=(lineno, message)))
+
+    def _set(self, resource, source_bytes, summary):
+        path = self._get_path(resource)
+        self.summaries[path] = (_get_content_key(source_bytes), summary)
+        self._dirty = True
+
+    def _get_path(self, resource):
+        if resource.project == self.project:
+            return resource.path
+        return resource.real_path
+
+    def _load_summaries(self):
+        if self.save:
+            result = self.project.data_files.read_data('summaries')
+            if result is not None and result[0] == sys.version:
+                self.summaries = result[1]
+
+    def write(self):
+        if self.save and self._dirty:
+            self.project.data_files.write_data(
+                'summaries', (sys.version, self.summaries))
+            self._dirty = False
+
+    @property
+    def save(self):
+        return self.project.prefs.get('save_module_summaries', False)
+
+
+def _get_content_key(source_bytes):
+    return hashlib.sha1(source_bytes).digest()
+
+
+def _get_global_statements(body):
+    for node in body:
+        yield node
+        if isinstance(node, ast.If):
+            children = [node.body, node.orelse]
+        elif isinstance(node, ast.TryExcept):
+            children = [node.body, node.orelse] + \
+                       [handler.body for handler in node.handlers]
+        elif isinstance(node, ast.TryFinally):
+            children = [node.body, node.finalbody]
+        else:
+            children = []
+        for child_body in children:
+            for child in _get_global_statements(child_body):
+                yield child
+
+
+def _get_global_imports(body):
+    result = []
+    for node in _get_global_statements(body):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                result.append((alias.name, 0, None))
+        elif isinstance(node, ast.ImportFrom):
+            names = [alias.name for alias in node.names]
+            result.append((node.module, node.level or 0, names))
+    return result
 
 
 class _ExtensionCache(object):
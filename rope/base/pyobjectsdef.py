@@ -3,6 +3,7 @@ import rope.base.evaluate
 import rope.base.builtins
 import rope.base.oi.soi
 import rope.base.pyscopes
+import rope.base.simplify
 from rope.base import (pynamesdef as pynames, exceptions, ast,
                        astutils, pyobjects, fscommands, arguments, utils)
 from rope.base.pyobjects import *
@@ -149,6 +150,8 @@ class PyModule(pyobjects.PyModule):
         ignore = pycore.project.prefs.get('ignore_syntax_errors', False)
         syntax_errors = force_errors or not ignore
         self.has_errors = False
+        self._source_bytes = None
+        self._syntax_errors = syntax_errors
         try:
             source, node = self._init_source(pycore, source, resource)
         except exceptions.ModuleSyntaxError:
@@ -168,10 +171,21 @@ class PyModule(pyobjects.PyModule):
         filename = 'string'
         if resource:
             filename = resource.path
+        summaries = None
         try:
             if source_code is None:
                 source_bytes = resource.read_bytes()
                 source_code = fscommands.file_data_to_unicode(source_bytes)
+                summaries = pycore.module_cache.summaries
+                summary = summaries.get(resource, source_bytes)
+                if summary is not None:
+                    if summary.error is not None:
+                        raise exceptions.ModuleSyntaxError(
+                            filename, *summary.error)
+                    # the summary only tells that the module has no
+                    # syntax errors; it is parsed when its AST is needed
+                    self._source_bytes = source_bytes
+                    return source_code, None
             else:
                 if isinstance(source_code, unicode):
                     source_bytes = fscommands.unicode_to_file_data(source_code)
@@ -179,11 +193,36 @@ class PyModule(pyobjects.PyModule):
                     source_bytes = source_code
             ast_node = ast.parse(source_bytes, filename=filename)
         except SyntaxError, e:
+            if summaries is not None:
+                summaries.add_error(resource, source_bytes, e.lineno, e.msg)
             raise exceptions.ModuleSyntaxError(filename, e.lineno, e.msg)
         except UnicodeDecodeError, e:
             raise exceptions.ModuleSyntaxError(filename, 1, '%s' % (e.reason))
+        if summaries is not None:
+            summaries.add(resource, source_bytes, ast_node)
         return source_code, ast_node
 
+    def _get_ast_node(self):
+        if self._ast_node is None and self._source_bytes is not None:
+            source_bytes = self._source_bytes
+            self._source_bytes = None
+            try:
+                self._ast_node = ast.parse(source_bytes,
+                                           filename=self.resource.path)
+            except SyntaxError, e:
+                # the summary did not match the contents
+                self.has_errors = True
+                self._ast_node = ast.parse('\n')
+                if self._syntax_errors:
+                    raise exceptions.ModuleSyntaxError(self.resource.path,
+                                                       e.lineno, e.msg)
+        return self._ast_node
+
+    def _set_ast_node(self, ast_node):
+        self._ast_node = ast_node
+
+    ast_node = property(_get_ast_node, _set_ast_node)
+
     @utils.prevent_recursion(lambda: {})
     def _create_concluded_attributes(self):
         result = {}
@@ -196,15 +235,19 @@ class PyModule(pyobjects.PyModule):
 
     @property
     @utils.saveit
+    def source_info(self):
+        """A `rope.base.simplify.SourceInfo` shared by source analyses"""
+        return rope.base.simplify.get_info(self.source_code)
+
+    @property
     def lines(self):
         """A `SourceLinesAdapter`"""
-        return rope.base.codeanalyze.SourceLinesAdapter(self.source_code)
+        return self.source_info.lines
 
     @property
-    @utils.saveit
     def logical_lines(self):
         """A `LogicalLinesFinder`"""
-        return rope.base.codeanalyze.CachingLogicalLineFinder(self.lines)
+        return self.source_info.logical_lines
 
 
 class PyPackage(pyobjects.PyPackage):
@@ -236,6 +279,8 @@ class PyPackage(pyobjects.PyPackage):
         init_dot_py = self._get_init_dot_py()
         if init_dot_py:
             init_object = self.pycore.resource_to_pyobject(init_dot_py)
+            self.pycore.module_cache.add_dependency(self.resource,
+                                                    init_dot_py)
             result.update(init_object.get_attributes())
         return result
 
@@ -1,3 +1,6 @@
+import bisect
+import heapq
+
 import rope.base.builtins
 import rope.base.codeanalyze
 import rope.base.pynames
@@ -228,31 +231,57 @@ class _HoldingScopeFinder(object):
         if line_indents is None:
             line_indents = self.get_indents(lineno)
         current_scope = module_scope
-        new_scope = current_scope
-        while new_scope is not None and \
-              (new_scope.get_kind() == 'Module' or
-               self._get_scope_indents(new_scope) <= line_indents):
-            current_scope = new_scope
-            if current_scope.get_start() == lineno and \
-               current_scope.get_kind() != 'Module':
-                return current_scope
-            new_scope = None
-            for scope in current_scope.get_scopes():
-                if scope.get_start() <= lineno:
-                    if lineno <= scope.get_end():
-                        new_scope = scope
-                        break
-                else:
-                    break
+        for scope in self._get_containing_scopes(module_scope, lineno):
+            if self._get_scope_indents(scope) > line_indents:
+                break
+            current_scope = scope
+            if scope.get_start() == lineno:
+                break
         return current_scope
 
+    def _get_containing_scopes(self, module_scope, lineno):
+        """Return the scopes containing `lineno`, the outermost first"""
+        starts, ends, parents, scopes = self._get_scope_index()
+        result = []
+        index = bisect.bisect(starts, lineno) - 1
+        while index >= 0:
+            if lineno <= ends[index]:
+                result.append(scopes[index])
+            index = parents[index]
+        result.reverse()
+        return result
+
+    @utils.saveit
+    def _get_scope_index(self):
+        """Return the scopes of the module sorted by their starts
+
+        The returned tuple holds four lists: the starts, the ends, the
+        index of the parent (or -1) and the scopes themselves.  Since
+        scopes nest, the scopes containing a line are the last scope
+        that starts before it and its parents.
+
+        """
+        entries = []
+        scopes = [(scope, None)
+                  for scope in self.pymodule.get_scope().get_scopes()]
+        while scopes:
+            scope, parent = scopes.pop()
+            entries.append((scope.get_start(), scope.get_end(),
+                            parent, scope))
+            scopes.extend([(child, scope) for child in scope.get_scopes()])
+        entries.sort(key=lambda entry: entry[0])
+        indices = dict((id(entry[3]), index)
+                       for index, entry in enumerate(entries))
+        parents = [-1 if entry[2] is None else indices[id(entry[2])]
+                   for entry in entries]
+        return ([entry[0] for entry in entries],
+                [entry[1] for entry in entries],
+                parents, [entry[3] for entry in entries])
+
     def _is_empty_line(self, lineno):
         line = self.lines.get_line(lineno)
         return line.strip() == '' or line.lstrip().startswith('#')
 
-    def _get_body_indents(self, scope):
-        return self.get_indents(scope.get_body_start())
-
     def get_holding_scope_for_offset(self, scope, offset):
         return self.get_holding_scope(
             scope, self.lines.get_line_number(offset))
@@ -260,13 +289,12 @@ class _HoldingScopeFinder(object):
     def find_scope_end(self, scope):
         if not scope.parent:
             return self.lines.length()
-        end = scope.pyobject.get_ast().body[-1].lineno
-        scope_start = self.pymodule.logical_lines.logical_line_in(scope.start)
-        if scope_start[1] >= end:
-            # handling one-liners
-            body_indents = self._get_scope_indents(scope) + 4
-        else:
-            body_indents = self._get_body_indents(scope)
+        node = scope.pyobject.get_ast()
+        scope_ends = self._get_scope_ends()
+        if node in scope_ends:
+            return scope_ends[node]
+        end = node.body[-1].lineno
+        body_indents = self._get_scope_body_indents(node)
         for l in self.logical_lines.generate_starts(
             min(end + 1, self.lines.length()), self.lines.length() + 1):
             if not self._is_empty_line(l):
@@ -276,6 +304,55 @@ class _HoldingScopeFinder(object):
                     end = l
         return end
 
+    def _get_scope_body_indents(self, node):
+        end = node.body[-1].lineno
+        scope_start = self.logical_lines.logical_line_in(node.lineno)
+        if scope_start[1] >= end:
+            # handling one-liners
+            return self.get_indents(node.lineno) + 4
+        return self.get_indents(node.body[0].lineno)
+
+    @utils.saveit
+    def _get_scope_ends(self):
+        """Find the logical ends of all scopes in a single pass
+
+        The end of a scope is the last non-empty logical line, after
+        its last body statement, that is not less indented than its
+        body.  Scopes whose end is not found yet are kept in a heap
+        ordered by their body indents.
+
+        """
+        length = self.lines.length()
+        pending = []
+        for node in _get_scope_nodes(self.pymodule.get_ast()):
+            end = node.body[-1].lineno
+            pending.append((min(end + 1, length), end,
+                            self._get_scope_body_indents(node), node))
+        pending.sort(key=lambda entry: entry[0])
+        pending.reverse()
+        result = {}
+        waiting = []
+        last = 0
+        for l in self.logical_lines.generate_starts(1, length + 1):
+            while pending and pending[-1][0] <= l:
+                entry = pending.pop()
+                heapq.heappush(waiting, (-entry[2], id(entry), entry))
+            if self._is_empty_line(l):
+                continue
+            indents = self.get_indents(l)
+            while waiting and -waiting[0][0] > indents:
+                self._set_scope_end(result, heapq.heappop(waiting)[2], last)
+            last = l
+        for entry in pending + [entry for i, j, entry in waiting]:
+            self._set_scope_end(result, entry, last)
+        return result
+
+    def _set_scope_end(self, result, entry, last):
+        start, end, body_indents, node = entry
+        if last >= start:
+            end = last
+        result[node] = end
+
     @property
     def lines(self):
         return self.pymodule.lines
@@ -288,6 +365,17 @@ class _HoldingScopeFinder(object):
     def logical_lines(self):
         return self.pymodule.logical_lines
 
+
+def _get_scope_nodes(node):
+    result = []
+    def add_scopes(node):
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            result.append(node)
+        return isinstance(node, ast.expr)
+    ast.call_for_nodes(node, add_scopes, recursive=True)
+    return result
+
+
 class TemporaryScope(Scope):
     """Currently used for list comprehensions and generator expressions
 
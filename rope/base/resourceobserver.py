@@ -84,6 +84,7 @@ class FilteredResourceObserver(object):
                  timekeeper=None):
         self.observer = resource_observer
         self.resources = {}
+        self._index = _PathTrie()
         if timekeeper is not None:
             self.timekeeper = timekeeper
         else:
@@ -98,15 +99,18 @@ class FilteredResourceObserver(object):
             self.resources[resource] = self.timekeeper.get_indicator(resource)
         else:
             self.resources[resource] = None
+        self._index.add(resource)
 
     def remove_resource(self, resource):
         """Add a resource to the list of interesting resources"""
         if resource in self.resources:
             del self.resources[resource]
+            self._index.remove(resource)
 
     def clear_resources(self):
         """Removes all registered resources"""
         self.resources.clear()
+        self._index.clear()
 
     def resource_changed(self, resource):
         changes = _Changes()
@@ -126,11 +130,10 @@ class FilteredResourceObserver(object):
         if new_resource in self.resources:
             changes.add_created(new_resource)
         if resource.is_folder():
-            for file in list(self.resources):
-                if resource.contains(file):
-                    new_file = self._calculate_new_resource(
-                        resource, new_resource, file)
-                    changes.add_removed(file, new_file)
+            for file in self._index.get_contents(resource):
+                new_file = self._calculate_new_resource(
+                    resource, new_resource, file)
+                changes.add_removed(file, new_file)
         if self._is_parent_changed(resource):
             changes.add_changed(resource.parent)
         if new_resource is not None:
@@ -194,9 +197,8 @@ class FilteredResourceObserver(object):
            self.resources[resource] is None:
             creations.add(resource)
         if resource.is_folder():
-            for file in self.resources:
-                if file.exists() and resource.contains(file) and \
-                   self.resources[file] is None:
+            for file in self._index.get_contents(resource):
+                if self.resources[file] is None and file.exists():
                     creations.add(file)
         return creations
 
@@ -205,16 +207,19 @@ class FilteredResourceObserver(object):
         if resource in self.resources and not resource.exists():
             all_moved.add(resource)
         if resource.is_folder():
-            for file in self.resources:
-                if resource.contains(file):
-                    if not file.exists():
-                        all_moved.add(file)
-        moved = set(all_moved)
-        for folder in [file for file in all_moved if file.is_folder()]:
-            if folder in moved:
-                for file in list(moved):
-                    if folder.contains(file):
-                        moved.remove(file)
+            for file in self._index.get_contents(resource):
+                if not file.exists():
+                    all_moved.add(file)
+        # only report the outermost moved resources
+        moved_folders = set(file.path for file in all_moved
+                            if file.is_folder())
+        moved = set()
+        for file in all_moved:
+            for path in _get_parent_paths(file.path):
+                if path in moved_folders:
+                    break
+            else:
+                moved.add(file)
         return moved
 
     def _search_resource_changes(self, resource):
@@ -222,10 +227,9 @@ class FilteredResourceObserver(object):
         if resource in self.resources and self._is_changed(resource):
             changed.add(resource)
         if resource.is_folder():
-            for file in self.resources:
-                if file.exists() and resource.contains(file):
-                    if self._is_changed(file):
-                        changed.add(file)
+            for file in self._index.get_contents(resource):
+                if file.exists() and self._is_changed(file):
+                    changed.add(file)
         return changed
 
     def _is_changed(self, resource):
@@ -269,3 +273,74 @@ class _Changes(object):
 
     def add_created(self, resource):
         self.creations.add(resource)
+
+
+class _PathTrie(object):
+    """Holds resources in a tree of their path segments
+
+    It is used for finding the registered resources inside a folder
+    without checking all of them.
+
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.root = _PathTrieNode()
+
+    def add(self, resource):
+        node = self.root
+        for name in _split_path(resource.path):
+            if name not in node.children:
+                node.children[name] = _PathTrieNode()
+            node = node.children[name]
+        node.resources.add(resource)
+
+    def remove(self, resource):
+        nodes = [self.root]
+        for name in _split_path(resource.path):
+            if name not in nodes[-1].children:
+                return
+            nodes.append(nodes[-1].children[name])
+        nodes[-1].resources.discard(resource)
+        names = _split_path(resource.path)
+        while names and not nodes[-1].resources and not nodes[-1].children:
+            nodes.pop()
+            del nodes[-1].children[names.pop()]
+
+    def get_contents(self, folder):
+        """Return the resources inside `folder`"""
+        node = self.root
+        for name in _split_path(folder.path):
+            if name not in node.children:
+                return []
+            node = node.children[name]
+        result = []
+        nodes = list(node.children.values())
+        while nodes:
+            node = nodes.pop()
+            result.extend(node.resources)
+            nodes.extend(node.children.values())
+        return result
+
+
+class _PathTrieNode(object):
+
+    __slots__ = ('children', 'resources')
+
+    def __init__(self):
+        self.children = {}
+        self.resources = set()
+
+
+def _split_path(path):
+    if not path:
+        return []
+    return path.split('/')
+
+
+def _get_parent_paths(path):
+    names = _split_path(path)
+    for index in range(len(names)):
+        yield '/'.join(names[:index])
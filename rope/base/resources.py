@@ -171,9 +171,14 @@ class Folder(Resource):
 
 class _ResourceMatcher(object):
 
+    # the maximum number of paths whose results are remembered
+    memo_size = 4096
+
     def __init__(self):
         self.patterns = []
-        self._compiled_patterns = []
+        self._pattern = None
+        self._matched = {}
+        self._links = {}
 
     def set_patterns(self, patterns):
         """Specify which resources to match
@@ -182,30 +187,81 @@ class _ResourceMatcher(object):
         ``?`` signs for matching resource names.
 
         """
-        self._compiled_patterns = None
+        self._pattern = None
+        self._matched.clear()
         self.patterns = patterns
 
-    def _add_pattern(self, pattern):
+    def _get_re_pattern(self, pattern):
         re_pattern = pattern.replace('.', '\\.').\
                      replace('*', '[^/]*').replace('?', '[^/]').\
-                     replace('//', '/(.*/)?')
-        re_pattern = '^(.*/)?' + re_pattern + '(/.*)?$'
-        self.compiled_patterns.append(re.compile(re_pattern))
+                     replace('//', '/(?:.*/)?')
+        return '^(?:.*/)?' + re_pattern + '(?:/.*)?$'
 
     def does_match(self, resource):
-        for pattern in self.compiled_patterns:
-            if pattern.match(resource.path):
-                return True
-        path = os.path.join(resource.project.address,
-                            *resource.path.split('/'))
-        if os.path.islink(path):
+        if self.does_match_path(resource.path):
             return True
-        return False
+        return self._is_link(resource)
 
-    @property
-    def compiled_patterns(self):
-        if self._compiled_patterns is None:
-            self._compiled_patterns = []
-            for pattern in self.patterns:
-                self._add_pattern(pattern)
-        return self._compiled_patterns
+    def _is_link(self, resource):
+        path = resource.path
+        try:
+            return self._links[path]
+        except KeyError:
+            pass
+        if len(self._links) >= self.memo_size:
+            self._links.clear()
+        real_path = os.path.join(resource.project.address,
+                                 *path.split('/'))
+        # the watcher thread may clear the memo before it is read
+        result = self._links[path] = os.path.islink(real_path)
+        return result
+
+    def forget_links(self, resource=None, new_resource=None):
+        """Forget which resources were found to be symbolic links
+
+        Call it when resources are created, moved or removed or when
+        the project is validated; the arguments are ignored so that it
+        can be used as a `ResourceObserver` callback.  Links created
+        outside rope are noticed after the project is validated.
+
+        """
+        self._links.clear()
+
+    def does_match_path(self, path):
+        """Return `True` if `path` matches one of the patterns
+
+        Unlike `does_match()` symbolic links are not checked.
+
+        """
+        try:
+            return self._matched[path]
+        except KeyError:
+            pass
+        if len(self._matched) >= self.memo_size:
+            self._matched.clear()
+        result = self._matched[path] = self._match(path)
+        return result
+
+    def filter(self, paths, links=()):
+        """Return the paths in `paths` that do not match
+
+        The paths in `links` are treated as symbolic links and are
+        matched, too.  Use it for passing the links found while
+        listing a folder so that they are not checked again.
+
+        """
+        return [path for path in paths
+                if path not in links and not self.does_match_path(path)]
+
+    def _match(self, path):
+        return self._get_pattern().match(path) is not None
+
+    def _get_pattern(self):
+        if self._pattern is None:
+            re_patterns = [self._get_re_pattern(pattern)
+                           for pattern in self.patterns]
+            if not re_patterns:
+                # matches nothing
+                re_patterns.append('(?!)')
+            self._pattern = re.compile('|'.join(re_patterns))
+        return self._pattern
@@ -2,12 +2,21 @@
 
 This module is here to help source code analysis.
 """
+import bisect
 import re
 
 from rope.base import codeanalyze, utils
 
 
-@utils.cached(7)
+@utils.cached(32)
+def get_info(source):
+    """Return the `SourceInfo` of `source`
+
+    The results for recently used sources are reused.
+    """
+    return SourceInfo(source)
+
+
 def real_code(source):
     """Simplify `source` for analysis
 
@@ -21,8 +30,83 @@ def real_code(source):
     The resulting code is a lot easier to analyze if we are interested
     only in offsets.
     """
+    return get_info(source).real_code
+
+
+def ignored_regions(source):
+    """Return ignored regions like strings and comments in `source` """
+    return get_info(source).ignored_regions
+
+
+class SourceInfo(object):
+    """Holds the analyses of a source shared by its users
+
+    Each analysis is performed the first time it is used.  See
+    `get_info()` and `rope.base.pyobjectsdef.PyModule.source_info`.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    @property
+    @utils.saveit
+    def ignored_regions(self):
+        """A sorted list of ``(start, end)`` of strings and comments"""
+        return [(match.start(), match.end())
+                for match in _str.finditer(self.source)]
+
+    @property
+    @utils.saveit
+    def comments(self):
+        """A sorted list of ``(start, end)`` of comments"""
+        return [(start, end) for start, end in self.ignored_regions
+                if self.source[start] == '#']
+
+    @property
+    @utils.saveit
+    def real_code(self):
+        """See `real_code()`"""
+        return _simplify(self.source, self.ignored_regions)
+
+    @property
+    @utils.saveit
+    def lines(self):
+        """A `rope.base.codeanalyze.SourceLinesAdapter`"""
+        return codeanalyze.SourceLinesAdapter(self.source)
+
+    @property
+    @utils.saveit
+    def logical_lines(self):
+        """A `rope.base.codeanalyze.CachingLogicalLineFinder`"""
+        return codeanalyze.CachingLogicalLineFinder(self.lines)
+
+    def is_ignored(self, offset):
+        """Return `True` if `offset` is in a string or a comment"""
+        return _in_regions(self._ignored_starts, self.ignored_regions,
+                           offset)
+
+    def is_in_comment(self, offset):
+        return _in_regions(self._comment_starts, self.comments, offset)
+
+    @property
+    @utils.saveit
+    def _ignored_starts(self):
+        return [start for start, end in self.ignored_regions]
+
+    @property
+    @utils.saveit
+    def _comment_starts(self):
+        return [start for start, end in self.comments]
+
+
+def _in_regions(starts, regions, offset):
+    index = bisect.bisect(starts, offset)
+    return index > 0 and offset < regions[index - 1][1]
+
+
+def _simplify(source, ignored_regions):
     collector = codeanalyze.ChangeCollector(source)
-    for start, end in ignored_regions(source):
+    for start, end in ignored_regions:
         if source[start] == '#':
             replacement = ' ' * (end - start)
         else:
@@ -44,12 +128,6 @@ def real_code(source):
     return source.replace('\\\n', '  ').replace('\t', ' ').replace(';', '\n')
 
 
-@utils.cached(7)
-def ignored_regions(source):
-    """Return ignored regions like strings and comments in `source` """
-    return [(match.start(), match.end()) for match in _str.finditer(source)]
-
-
 _str = re.compile('%s|%s' % (codeanalyze.get_comment_pattern(),
                              codeanalyze.get_string_pattern()))
 _parens = re.compile(r'[\({\[\]}\)\n]')
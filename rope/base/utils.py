@@ -1,4 +1,6 @@
+import threading
 import warnings
+import weakref
 
 
 def saveit(func):
@@ -29,6 +31,19 @@ def prevent_recursion(default):
     return decorator
 
 
+def locked(method):
+    """A decorator that calls `method` holding the `lock` of the object"""
+    def newmethod(self, *args, **kwds):
+        self.lock.acquire()
+        try:
+            return method(self, *args, **kwds)
+        finally:
+            self.lock.release()
+    newmethod.__name__ = method.__name__
+    newmethod.__doc__ = method.__doc__
+    return newmethod
+
+
 def ignore_exception(exception_class):
     """A decorator that ignores `exception_class` exceptions"""
     def _decorator(func):
@@ -53,26 +68,112 @@ def deprecated(message=None):
     return _decorator
 
 
-def cached(count):
-    """A caching decorator based on parameter objects"""
+def cached(count, weak=False):
+    """A caching decorator based on parameter objects
+
+    The results of the `count` most recently used parameters are
+    kept.  If `weak` is `True`, results are held with weak references
+    when possible.  The `hits` and `misses` attributes of the returned
+    function count cache lookups.
+
+    """
     def decorator(func):
-        return _Cached(func, count)
+        return _Cached(func, count, weak)
     return decorator
 
 class _Cached(object):
+    """A least recently used cache keyed by the hash of parameters
 
-    def __init__(self, func, count):
+    Entries are kept in a circular doubly linked list of
+    ``[previous, next, key, result]`` lists, the most recently used
+    one being right after `self.root`.  The list is changed holding
+    `lock`, since cached functions are called from DOA threads, too;
+    `func` is called without holding it.
+
+    """
+
+    def __init__(self, func, count, weak=False):
         self.func = func
-        self.cache = []
         self.count = count
+        self.weak = weak
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.cache = {}
+            self.root = []
+            self.root[:] = [self.root, self.root, None, None]
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self.lock.release()
 
     def __call__(self, *args, **kwds):
-        key = (args, kwds)
-        for cached_key, cached_result in self.cache:
-            if cached_key == key:
-                return cached_result
+        key = args
+        if kwds:
+            key = (args, frozenset(kwds.items()))
+        self.lock.acquire()
+        try:
+            try:
+                link = self.cache.get(key)
+            except TypeError:
+                # unhashable parameters
+                key = None
+                link = None
+            if link is not None:
+                result = link[3]
+                if self.weak and isinstance(result, weakref.ref):
+                    result = result()
+                if result is not None or link[3] is None:
+                    self.hits += 1
+                    self._unlink(link)
+                    self._link_first(link)
+                    return result
+                self._remove(link)
+            self.misses += 1
+        finally:
+            self.lock.release()
         result = self.func(*args, **kwds)
-        self.cache.append((key, result))
-        if len(self.cache) > self.count:
-            del self.cache[0]
+        if key is not None:
+            self._add(key, result)
         return result
+
+    def _add(self, key, result):
+        stored = result
+        if self.weak:
+            try:
+                stored = weakref.ref(result)
+            except TypeError:
+                pass
+        link = [None, None, key, stored]
+        self.lock.acquire()
+        try:
+            if key in self.cache:
+                # added by another thread meanwhile
+                self._remove(self.cache[key])
+            self._link_first(link)
+            self.cache[key] = link
+            while len(self.cache) > self.count:
+                self._remove(self.root[0])
+        finally:
+            self.lock.release()
+
+    def _remove(self, link):
+        self._unlink(link)
+        del self.cache[link[2]]
+
+    def _unlink(self, link):
+        previous, next = link[0], link[1]
+        previous[1] = next
+        next[0] = previous
+
+    def _link_first(self, link):
+        first = self.root[1]
+        link[0] = self.root
+        link[1] = first
+        first[0] = link
+        self.root[1] = link
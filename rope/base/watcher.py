@@ -0,0 +1,340 @@
+"""Noticing changes made outside rope in a background thread
+
+`Project.validate()` checks all of the resources rope has cached
+information about in the calling thread.  A `Watcher` instead keeps a
+snapshot of the modification times and sizes of the files in the
+project and compares it with the file system in a background thread.
+Each background scan lists the folders whose modification time has
+changed and checks a limited number of files, so a round of scans
+covers the whole project.  The changes found are queued and reported
+to project observers when `Watcher.report_changes()` is called::
+
+  watcher = Watcher(project)
+  watcher.start()
+  # ...
+  watcher.report_changes()  # before performing refactorings
+  # ...
+  watcher.stop()
+
+Changes are not reported in the background thread because the caches
+of rope are not thread-safe; reporting the queued changes is cheap,
+though, since it does not touch the file system.
+
+"""
+import os
+import stat
+import threading
+import Queue
+
+from rope.base import resourceobserver
+
+
+class Watcher(object):
+    """Watches the files of a project for external changes"""
+
+    def __init__(self, project, interval=1.0, files_per_scan=1000):
+        """`interval` is the number of seconds between scans
+
+        The background thread checks at most `files_per_scan` files
+        for changes in each scan; the next scan continues with the
+        rest.  If it is `None`, all files are checked in each scan.
+
+        """
+        self.project = project
+        self.interval = interval
+        self.files_per_scan = files_per_scan
+        self.files = {}
+        self.folders = {}
+        self.queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._snapshot = False
+        # the files not checked in the current round of scans
+        self._unscanned = []
+        # changes made by rope itself are not reported again
+        observer = resourceobserver.ResourceObserver(
+            changed=self._update, moved=self._moved, created=self._update,
+            removed=self._update)
+        self.project.add_observer(observer)
+
+    def start(self):
+        """Start scanning the project in a background thread"""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def check(self):
+        """Scan the project and report the changes in this thread"""
+        self.scan()
+        self.report_changes()
+
+    def scan(self, count=None):
+        """Compare the project with the snapshot and queue the changes
+
+        The first call only takes the snapshot.  Folders whose
+        modification time changed are listed again.  If `count` is not
+        `None`, at most `count` files are checked for changes,
+        continuing with the files the previous call did not check.
+
+        The file system is read without holding the lock that rope's
+        changes take for updating the snapshot; the results are
+        applied holding it, unless rope changed the same resources
+        meanwhile.
+
+        """
+        if not self._snapshot:
+            files, folders, created = self._walk('')
+            self._lock.acquire()
+            try:
+                self.files.update(files)
+                self.folders.update(folders)
+                self._snapshot = True
+            finally:
+                self._lock.release()
+            return
+        changes = []
+        self._scan_folders(changes)
+        self._scan_files(changes, count)
+        if changes:
+            self.queue.put(changes)
+
+    def report_changes(self):
+        """Report the queued changes to project observers
+
+        It returns the number of reported changes.
+
+        """
+        count = 0
+        while True:
+            try:
+                changes = self.queue.get_nowait()
+            except Queue.Empty:
+                break
+            for kind, path, is_folder in changes:
+                if is_folder:
+                    resource = self.project.get_folder(path)
+                else:
+                    resource = self.project.get_file(path)
+                for observer in list(self.project.observers):
+                    getattr(observer, 'resource_' + kind)(resource)
+            count += len(changes)
+        return count
+
+    def _update(self, resource):
+        if not self._snapshot:
+            return
+        path = resource.path
+        walked = None
+        indicator = None
+        if resource.is_folder():
+            if resource.exists() and not self.project.is_ignored(resource):
+                walked = self._walk(path)
+        elif not self.project.is_ignored(resource):
+            indicator = self._get_indicator(path)
+        self._lock.acquire()
+        try:
+            if resource.is_folder():
+                self._remove_folder(path)
+                if walked is not None:
+                    self.files.update(walked[0])
+                    self.folders.update(walked[1])
+            elif indicator is None:
+                self.files.pop(path, None)
+            else:
+                self.files[path] = indicator
+        finally:
+            self._lock.release()
+
+    def _moved(self, resource, new_resource):
+        self._update(resource)
+        self._update(new_resource)
+
+    def _run(self):
+        while not self._stopped.isSet():
+            self.scan(self.files_per_scan)
+            self._stopped.wait(self.interval)
+
+    def _scan_folders(self, changes):
+        self._lock.acquire()
+        try:
+            folders = dict(self.folders)
+        finally:
+            self._lock.release()
+        removed = []
+        listed = []
+        for path in sorted(folders):
+            if any(path.startswith(folder + '/') for folder in removed):
+                continue
+            mode, mtime = _stat(self._get_real_path(path))
+            if mode is None or not stat.S_ISDIR(mode):
+                removed.append(path)
+            # on dos, mtime does not change for a folder when files are added
+            elif mtime != folders[path] or os.name != 'posix':
+                files, subfolders = self._list(path)
+                # reading the new files and folders, too; membership
+                # tests are safe without the lock and are checked again
+                new_files = dict((child, self._get_indicator(child))
+                                 for child in files
+                                 if child not in self.files)
+                walked = [(child, self._walk(child))
+                          for child in sorted(subfolders)
+                          if child not in self.folders]
+                listed.append((path, mtime, files, new_files, walked))
+        self._lock.acquire()
+        try:
+            for path in removed:
+                if self.folders.get(path) == folders[path]:
+                    self._remove_folder(path)
+                    changes.append(('removed', path, True))
+            for path, mtime, files, new_files, walked in listed:
+                if self.folders.get(path) != folders[path]:
+                    # changed by rope meanwhile
+                    continue
+                self.folders[path] = mtime
+                self._apply_children(path, files, new_files, walked, changes)
+        finally:
+            self._lock.release()
+
+    def _apply_children(self, path, files, new_files, walked, changes):
+        prefix = path and path + '/'
+        for child, indicator in sorted(new_files.items()):
+            if child not in self.files and indicator is not None:
+                self.files[child] = indicator
+                changes.append(('created', child, False))
+        for child, (child_files, child_folders, created) in walked:
+            if child not in self.folders:
+                changes.append(('created', child, True))
+                self.files.update(child_files)
+                self.folders.update(child_folders)
+                changes.extend(created)
+        for child in list(self.files):
+            if child.startswith(prefix) and '/' not in child[len(prefix):] \
+               and child not in files:
+                del self.files[child]
+                changes.append(('removed', child, False))
+
+    def _scan_files(self, changes, count=None):
+        self._lock.acquire()
+        try:
+            checked = self._next_files(count)
+        finally:
+            self._lock.release()
+        indicators = [(path, indicator, self._get_indicator(path))
+                      for path, indicator in checked]
+        self._lock.acquire()
+        try:
+            for path, indicator, new_indicator in indicators:
+                if self.files.get(path) != indicator:
+                    # changed by rope or by a folder scan meanwhile
+                    continue
+                if new_indicator is None:
+                    del self.files[path]
+                    changes.append(('removed', path, False))
+                elif new_indicator != indicator:
+                    self.files[path] = new_indicator
+                    changes.append(('changed', path, False))
+        finally:
+            self._lock.release()
+
+    def _next_files(self, count):
+        """Return the next `count` ``(path, indicator)`` to check"""
+        if count is None:
+            return self.files.items()
+        result = []
+        refilled = False
+        while len(result) < count:
+            if not self._unscanned:
+                if refilled:
+                    break
+                self._unscanned = list(self.files)
+                refilled = True
+            path = self._unscanned.pop()
+            if path in self.files:
+                result.append((path, self.files[path]))
+        return result
+
+    def _walk(self, path):
+        """Read the files and folders inside `path`
+
+        Returns the indicators of the files, the modification times of
+        the folders, including `path`, and the ``created`` changes for
+        them, which is used when `path` is a new folder.
+
+        """
+        files = {}
+        folders = {}
+        created = []
+        folders[path] = _stat(self._get_real_path(path))[1]
+        children, subfolders = self._list(path)
+        for child in sorted(children):
+            indicator = self._get_indicator(child)
+            if indicator is not None:
+                files[child] = indicator
+                created.append(('created', child, False))
+        for child in sorted(subfolders):
+            created.append(('created', child, True))
+            child_files, child_folders, child_created = self._walk(child)
+            files.update(child_files)
+            folders.update(child_folders)
+            created.extend(child_created)
+        return files, folders, created
+
+    def _remove_folder(self, path):
+        prefix = path + '/'
+        for paths in (self.files, self.folders):
+            for child in list(paths):
+                if child == path or child.startswith(prefix):
+                    del paths[child]
+
+    def _list(self, path):
+        """Return the files and folders in `path` that are not ignored"""
+        real_path = self._get_real_path(path)
+        try:
+            names = os.listdir(real_path)
+        except OSError:
+            return set(), set()
+        prefix = path and path + '/'
+        modes = {}
+        links = set()
+        for name in names:
+            mode = _stat(os.path.join(real_path, name), os.lstat)[0]
+            if mode is not None:
+                modes[prefix + name] = mode
+                if stat.S_ISLNK(mode):
+                    links.add(prefix + name)
+        files = set()
+        folders = set()
+        for child in self.project.ignored.filter(modes, links):
+            if stat.S_ISDIR(modes[child]):
+                folders.add(child)
+            elif stat.S_ISREG(modes[child]):
+                files.add(child)
+        return files, folders
+
+    def _get_indicator(self, path):
+        try:
+            result = os.stat(self._get_real_path(path))
+        except OSError:
+            return None
+        return (result.st_mtime, result.st_size)
+
+    def _get_real_path(self, path):
+        return self.project._get_resource_path(path)
+
+
+def _stat(path, function=os.stat):
+    try:
+        result = function(path)
+    except OSError:
+        return None, None
+    return result.st_mode, result.st_mtime
@@ -1,4 +1,3 @@
-import bisect
 import keyword
 
 import rope.base.simplify
@@ -18,24 +17,19 @@ class Worder(object):
     """
 
     def __init__(self, code, handle_ignores=False):
-        simplified = rope.base.simplify.real_code(code)
-        self.code_finder = _RealFinder(simplified, code)
+        self.info = rope.base.simplify.get_info(code)
+        self.code_finder = _RealFinder(self.info.real_code, code)
         self.handle_ignores = handle_ignores
         self.code = code
 
     def _init_ignores(self):
-        ignores = rope.base.simplify.ignored_regions(self.code)
         self.dumb_finder = _RealFinder(self.code, self.code)
-        self.starts = [ignored[0] for ignored in ignores]
-        self.ends = [ignored[1] for ignored in ignores]
 
     def _context_call(self, name, offset):
-        if self.handle_ignores:
-            if not hasattr(self, 'starts'):
+        if self.handle_ignores and self.info.is_ignored(offset):
+            if not hasattr(self, 'dumb_finder'):
                 self._init_ignores()
-            start = bisect.bisect(self.starts, offset)
-            if start > 0 and offset < self.ends[start - 1]:
-                return getattr(self.dumb_finder, name)(offset)
+            return getattr(self.dumb_finder, name)(offset)
         return getattr(self.code_finder, name)(offset)
 
     def get_primary_at(self, offset):
@@ -44,6 +44,10 @@ class ChangeSignature(object):
         if resources is None:
             resources = self.pycore.get_python_files()
         changes = ChangeSet('Changing signature of <%s>' % self.name)
+        names = [self.name]
+        if self.others:
+            names.append(self.others[0])
+        resources = self.pycore.name_index.filter_resources(resources, *names)
         job_set = handle.create_jobset('Collecting Changes', len(resources))
         finder = occurrences.create_finder(
             self.pycore, self.name, self.pyname, instance=self.primary,
@@ -126,6 +126,9 @@ class InlineMethod(_Inliner):
             resources = [self.original]
             if remove:
                 resources.append(self.resource)
+        resources = [resource for resource in resources
+                     if resource == self.resource or
+                     self.pycore.name_index.contains(resource, self.name)]
         job_set = task_handle.create_jobset('Collecting Changes',
                                             len(resources))
         for file in resources:
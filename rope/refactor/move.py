@@ -242,6 +242,9 @@ class MoveGlobal(object):
 
     def _calculate_changes(self, dest, resources, task_handle):
         changes = ChangeSet('Moving global <%s>' % self.old_name)
+        resources = [resource for resource in resources
+                     if resource in (self.source, dest) or
+                     self.pycore.name_index.contains(resource, self.old_name)]
         job_set = task_handle.create_jobset('Collecting Changes',
                                             len(resources))
         for file_ in resources:
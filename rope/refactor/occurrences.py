@@ -1,7 +1,8 @@
 import re
 
 import rope.base.pynames
-from rope.base import pynames, pyobjects, codeanalyze, evaluate, exceptions, utils, worder
+from rope.base import (pynames, pyobjects, evaluate, exceptions,
+                       simplify, utils, worder)
 
 
 class Finder(object):
@@ -28,6 +29,9 @@ class Finder(object):
 
     def find_occurrences(self, resource=None, pymodule=None):
         """Generate `Occurrence` instances"""
+        if resource is not None and \
+           not self.pycore.name_index.contains(resource, self.name):
+            return
         tools = _OccurrenceToolsCreator(self.pycore, resource=resource,
                                         pymodule=pymodule, docs=self.docs)
         for offset in self._textual_finder.find_offsets(tools.source_code):
@@ -231,10 +235,7 @@ class _TextualFinder(object):
     def __init__(self, name, docs=False):
         self.name = name
         self.docs = docs
-        self.comment_pattern = _TextualFinder.any('comment', [r'#[^\n]*'])
-        self.string_pattern = _TextualFinder.any(
-            'string', [codeanalyze.get_string_pattern()])
-        self.pattern = self._get_occurrence_pattern(self.name)
+        self.pattern = re.compile('\\b' + name + '\\b')
 
     def find_offsets(self, source):
         if not self._fast_file_query(source):
@@ -247,10 +248,11 @@ class _TextualFinder(object):
             yield matched
 
     def _re_search(self, source):
+        # strings and comments are found once for each source
+        info = simplify.get_info(source)
         for match in self.pattern.finditer(source):
-            for key, value in match.groupdict().items():
-                if value and key == 'occurrence':
-                    yield match.start(key)
+            if not info.is_ignored(match.start()):
+                yield match.start()
 
     def _normal_search(self, source):
         current = 0
@@ -280,17 +282,6 @@ class _TextualFinder(object):
         else:
             return pymodule.source_code
 
-    def _get_occurrence_pattern(self, name):
-        occurrence_pattern = _TextualFinder.any('occurrence',
-                                                 ['\\b' + name + '\\b'])
-        pattern = re.compile(occurrence_pattern + '|' + self.comment_pattern +
-                             '|' + self.string_pattern)
-        return pattern
-
-    @staticmethod
-    def any(name, list_):
-        return '(?P<%s>' % name + '|'.join(list_) + ')'
-
 
 class _OccurrenceToolsCreator(object):
 
@@ -2,7 +2,7 @@ import collections
 import re
 import warnings
 
-from rope.base import ast, codeanalyze, exceptions
+from rope.base import ast, codeanalyze, exceptions, simplify
 
 
 def get_patched_ast(source, sorted_children=False):
@@ -63,7 +63,7 @@ class _PatchingASTWalker(object):
     def __init__(self, source, children=False):
         self.source = _Source(source)
         self.children = children
-        self.lines = codeanalyze.SourceLinesAdapter(source)
+        self.lines = self.source.info.lines
         self.children_stack = []
 
     Number = object()
@@ -631,13 +631,14 @@ class _Source(object):
 
     def __init__(self, source):
         self.source = source
+        self.info = simplify.get_info(source)
         self.offset = 0
 
     def consume(self, token):
         try:
             while True:
                 new_offset = self.source.index(token, self.offset)
-                if self._good_token(token, new_offset):
+                if self._good_token(new_offset):
                     break
                 else:
                     self._skip_comment()
@@ -676,19 +677,9 @@ class _Source(object):
         return self._consume_pattern(repattern)
 
 
-    def _good_token(self, token, offset, start=None):
-        """Checks whether consumed token is in comments"""
-        if start is None:
-            start = self.offset
-        try:
-            comment_index = self.source.rindex('#', start, offset)
-        except ValueError:
-            return True
-        try:
-            new_line_index = self.source.rindex('\n', start, offset)
-        except ValueError:
-            return False
-        return comment_index < new_line_index
+    def _good_token(self, offset):
+        """Checks whether the token consumed at `offset` is not in comments"""
+        return not self.info.is_in_comment(offset)
 
     def _skip_comment(self):
         self.offset = self.source.index('\n', self.offset + 1)
@@ -702,7 +693,7 @@ class _Source(object):
             if end is None:
                 end = len(self.source)
             match = repattern.search(self.source, self.offset, end)
-            if self._good_token(match.group(), match.start()):
+            if self._good_token(match.start()):
                 break
             else:
                 self._skip_comment()
@@ -718,7 +709,7 @@ class _Source(object):
         while True:
             try:
                 index = self.source.rindex(token, start, end)
-                if self._good_token(token, index, start=start):
+                if self._good_token(index):
                     return index
                 else:
                     end = index
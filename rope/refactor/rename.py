@@ -1,6 +1,6 @@
 import warnings
 
-from rope.base import exceptions, pyobjects, pynames, taskhandle, evaluate, worder, codeanalyze
+from rope.base import exceptions, pyobjects, pynames, taskhandle, evaluate, worder, codeanalyze, parallel
 from rope.base.change import ChangeSet, ChangeContents, MoveResource
 from rope.refactor import occurrences, sourceutils
 
@@ -18,6 +18,7 @@ class Rename(object):
         self.project = project
         self.pycore = project.pycore
         self.resource = resource
+        self.offset = offset
         if offset is not None:
             self.old_name = worder.get_name_at(self.resource, offset)
             this_pymodule = self.pycore.resource_to_pyobject(self.resource)
@@ -44,7 +45,7 @@ class Rename(object):
 
     def get_changes(self, new_name, in_file=None, in_hierarchy=False,
                     unsure=None, docs=False, resources=None,
-                    task_handle=taskhandle.NullTaskHandle()):
+                    task_handle=taskhandle.NullTaskHandle(), processes=None):
         """Get the changes needed for this refactoring
 
         Parameters:
@@ -64,6 +65,12 @@ class Rename(object):
           will be applied to all python files.
         - `in_file`: this argument has been deprecated; use
           `resources` instead.
+        - `processes`: if not `None`, the occurrences are searched
+          in this many worker processes, each of which opens the
+          project separately.  Workers see the files and the object
+          information saved on disk.  It is ignored if
+          `multiprocessing` module or the pickling of `unsure` is not
+          available.
 
         """
         if unsure in (True, False):
@@ -85,22 +92,61 @@ class Rename(object):
             resources = self.pycore.get_python_files()
         changes = ChangeSet('Renaming <%s> to <%s>' %
                             (self.old_name, new_name))
-        finder = occurrences.create_finder(
+        files = self.pycore.name_index.filter_resources(resources,
+                                                        self.old_name)
+        job_set = task_handle.create_jobset('Collecting Changes', len(files))
+        if processes is not None and len(files) > 1 and \
+           parallel.is_available() and parallel.can_pass(unsure):
+            collected = self._collect_in_processes(
+                files, processes, job_set,
+                (new_name, in_hierarchy, unsure, docs))
+        else:
+            finder = self._create_finder(unsure, docs, in_hierarchy)
+            collected = self._collect(finder, files, job_set, new_name)
+        for file_, new_content in collected:
+            changes.add_change(ChangeContents(file_, new_content))
+        if self._is_renaming_a_module():
+            resource = self.old_pyname.get_object().get_resource()
+            if self._is_allowed_to_move(resources, resource):
+                self._rename_module(resource, new_name, changes)
+        return changes
+
+    def _create_finder(self, unsure, docs, in_hierarchy):
+        return occurrences.create_finder(
             self.pycore, self.old_name, self.old_pyname, unsure=unsure,
             docs=docs, instance=self.old_instance,
             in_hierarchy=in_hierarchy and self.is_method())
-        job_set = task_handle.create_jobset('Collecting Changes', len(resources))
-        for file_ in resources:
+
+    def _collect(self, finder, files, job_set, new_name):
+        result = []
+        for file_ in files:
             job_set.started_job(file_.path)
             new_content = rename_in_module(finder, new_name, resource=file_)
             if new_content is not None:
-                changes.add_change(ChangeContents(file_, new_content))
+                result.append((file_, new_content))
             job_set.finished_job()
-        if self._is_renaming_a_module():
-            resource = self.old_pyname.get_object().get_resource()
-            if self._is_allowed_to_move(resources, resource):
-                self._rename_module(resource, new_name, changes)
-        return changes
+        return result
+
+    def _collect_in_processes(self, files, processes, job_set, args):
+        result = []
+        tasks = []
+        for shard in parallel.split(files, processes * 4):
+            paths = [file_.path for file_ in shard]
+            tasks.append((self.resource.path, self.offset, args, paths))
+        contents = parallel.imap(self.project, _rename_in_worker, tasks,
+                                 processes)
+        try:
+            for task in tasks:
+                changed = contents.next()
+                for path in task[-1]:
+                    job_set.started_job(path)
+                    if path in changed:
+                        file_ = self.project.get_file(path)
+                        result.append((file_, changed[path]))
+                    job_set.finished_job()
+        finally:
+            contents.close()
+        return result
 
     def _is_allowed_to_move(self, resources, resource):
         if resource.is_folder():
@@ -203,6 +249,17 @@ def rename_in_module(occurrences_finder, new_name, resource=None, pymodule=None,
             change_collector.add_change(start, end, new_name)
     return change_collector.get_changed()
 
+def _rename_in_worker(project, path, offset, args, paths):
+    new_name, in_hierarchy, unsure, docs = args
+    renamer = Rename(project, project.get_resource(path), offset)
+    finder = renamer._create_finder(unsure, docs, in_hierarchy)
+    result = {}
+    for file_, new_content in renamer._collect(
+            finder, [project.get_file(path) for path in paths],
+            taskhandle.NullJobSet(), new_name):
+        result[file_.path] = new_content
+    return result
+
 def _is_local(pyname):
     module, lineno = pyname.get_definition_location()
     if lineno is None:
@@ -1,7 +1,16 @@
+import marshal
+import os
+import threading
 import unittest
 
+import rope.base.ast
 import rope.base.oi
+import rope.base.oi.doa
+import rope.base.oi.sqlitedb
 import rope.base.libutils
+import rope.base.parallel
+import rope.base.project
+import rope.base.taskhandle
 from ropetest import testutils
 
 
@@ -338,6 +347,216 @@ class DynamicOITest(unittest.TestCase):
         self.assertEquals(pymod2['C'].get_object(),
                           pymod['a_var'].get_object())
 
+    def test_dti_with_sqlite_storage(self):
+        if not rope.base.oi.sqlitedb.is_available():
+            return
+        testutils.remove_project(self.project)
+        self.project = testutils.sample_project(validate_objectdb=True,
+                                                objectdb_storage='sqlite',
+                                                save_objectdb=True)
+        self.pycore = self.project.pycore
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'def a_func(arg):\n    return eval("arg")\n' \
+               'a_var = a_func(a_func)\n'
+        mod.write(code)
+        runner = self.pycore.run_module(mod)
+        runner.wait_process()
+        self.assertTrue(runner.ingestor.processed > 0)
+        pymod = self.pycore.resource_to_pyobject(mod)
+        self.assertEquals(pymod['a_func'].get_object(),
+                          pymod['a_var'].get_object())
+        self.project.close()
+        db = self.pycore.object_info.objectdb.db
+        self.assertEquals(None, db._connection)
+
+    def test_dti_without_batching(self):
+        self.project.prefs['max_doa_samples'] = 0
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'def a_func(arg):\n    return eval("arg")\n' \
+               'a_var = a_func(a_func)\n'
+        mod.write(code)
+        self.pycore.run_module(mod).wait_process()
+        pymod = self.pycore.resource_to_pyobject(mod)
+        self.assertEquals(pymod['a_func'].get_object(),
+                          pymod['a_var'].get_object())
+
+    def test_recording_calls_with_the_same_types_once(self):
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'class C1(object):\n    pass\nclass C2(object):\n    pass\n' \
+               'def a_func(arg):\n    return arg\n' \
+               'for i in range(100):\n    a_func(C1())\n    a_func(C2())\n' \
+               '    a_func([C1()])\n'
+        mod.write(code)
+        self.pycore.run_module(mod).wait_process()
+        calls = self.pycore.object_info.objectdb.get_callinfos(
+            'mod.py', 'a_func')
+        self.assertEquals(3, len(list(calls)))
+
+    def test_limiting_recorded_calls(self):
+        self.project.prefs['max_doa_samples'] = 2
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'import sys\ndef a_func(arg):\n    return arg\n' \
+               'a_func("")\na_func([""])\na_func({})\na_func(sys)\n'
+        mod.write(code)
+        self.pycore.run_module(mod).wait_process()
+        calls = self.pycore.object_info.objectdb.get_callinfos(
+            'mod.py', 'a_func')
+        self.assertEquals(2, len(list(calls)))
+
+    def test_recording_calls_of_many_threads(self):
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'import threading\n' \
+               'class C1(object):\n    pass\nclass C2(object):\n    pass\n' \
+               'class C3(object):\n    pass\nclass C4(object):\n    pass\n' \
+               'def a_func(arg):\n    return arg\n' \
+               'def run(cls):\n    for i in range(100):\n' \
+               '        a_func(cls())\n' \
+               'threads = [threading.Thread(target=run, args=(cls,))\n' \
+               '           for cls in [C1, C2, C3, C4]]\n' \
+               'for thread in threads:\n    thread.start()\n' \
+               'for thread in threads:\n    thread.join()\n'
+        mod.write(code)
+        self.pycore.run_module(mod).wait_process()
+        calls = self.pycore.object_info.objectdb.get_callinfos(
+            'mod.py', 'a_func')
+        self.assertEquals(4, len(list(calls)))
+
+    def test_sending_recorded_calls_when_exiting(self):
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'import sys\ndef a_func(arg):\n    return eval("arg")\n' \
+               'a_var = a_func(a_func)\nsys.exit(1)\n'
+        mod.write(code)
+        self.pycore.run_module(mod).wait_process()
+        pymod = self.pycore.resource_to_pyobject(mod)
+        self.assertEquals(pymod['a_func'].get_object(),
+                          pymod['a_var'].get_object())
+
+    def test_writing_trace_files(self):
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'def a_func(arg):\n    return eval("arg")\n' \
+               'a_var = a_func(a_func)\n'
+        mod.write(code)
+        trace = os.path.join(self.project.address, 'trace')
+        self.pycore.run_module(mod, trace_file=trace).wait_process()
+        pymod = self.pycore.resource_to_pyobject(mod)
+        self.assertNotEquals(pymod['a_func'].get_object(),
+                             pymod['a_var'].get_object())
+        self.assertTrue(len(list(rope.base.oi.doa.read_trace_file(trace))) > 0)
+
+    def test_analyzing_trace_files(self):
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'def a_func(arg):\n    return eval("arg")\n' \
+               'a_var = a_func(a_func)\n'
+        mod.write(code)
+        traces = [os.path.join(self.project.address, name)
+                  for name in ('trace1', 'trace2')]
+        for trace in traces:
+            self.pycore.run_module(mod, trace_file=trace).wait_process()
+        ingestor = self.pycore.analyze_trace_files(traces)
+        self.assertTrue(ingestor.processed > 0)
+        self.assertEquals(ingestor.processed, ingestor.duplicates)
+        pymod = self.pycore.resource_to_pyobject(mod)
+        self.assertEquals(pymod['a_func'].get_object(),
+                          pymod['a_var'].get_object())
+
+    def test_reading_incomplete_trace_files(self):
+        trace = os.path.join(self.project.address, 'trace')
+        output = open(trace, 'wb')
+        marshal.dump([('a', 1), ('b', 2)], output)
+        marshal.dump(('c', 3), output)
+        output.write(marshal.dumps([('d', 4)])[:3])
+        output.close()
+        self.assertEquals([('a', 1), ('b', 2), ('c', 3)],
+                          list(rope.base.oi.doa.read_trace_file(trace)))
+
+    def test_running_modules_in_parallel(self):
+        mod1 = testutils.create_module(self.project, 'mod1')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod1.write('def a_func(arg):\n    return eval("arg")\n'
+                   'a_var = a_func(a_func)\n')
+        mod2.write('def b_func(arg):\n    return eval("arg")\n'
+                   'b_var = b_func(b_func)\n')
+        runner = self.pycore.run_modules([(mod1, None), (mod2, None)],
+                                         processes=2)
+        runner.wait_process()
+        self.assertEquals(2, len(runner.runners))
+        pymod1 = self.pycore.resource_to_pyobject(mod1)
+        pymod2 = self.pycore.resource_to_pyobject(mod2)
+        self.assertEquals(pymod1['a_func'].get_object(),
+                          pymod1['a_var'].get_object())
+        self.assertEquals(pymod2['b_func'].get_object(),
+                          pymod2['b_var'].get_object())
+
+    def test_finishing_parallel_runs_without_waiting(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('def a_func(arg):\n    return eval("arg")\n'
+                  'a_var = a_func(a_func)\n')
+        finished = threading.Event()
+        runner = rope.base.oi.doa.MultiFileRunner(
+            self.pycore, [(mod, None), (mod, None)],
+            analyze_data=self.pycore.object_info.doa_data_received,
+            lock=self.pycore.lock, processes=2)
+        runner.add_finishing_observer(finished.set)
+        runner.run()
+        finished.wait(60)
+        self.assertTrue(finished.isSet())
+        self.assertEquals(None, runner.ingestor.thread)
+        self.assertTrue(runner.ingestor.processed > 0)
+
+    def test_running_shards_of_a_module(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('import sys\nclass C1(object):\n    pass\n'
+                  'class C2(object):\n    pass\n'
+                  'def a_func(arg):\n    return arg\n'
+                  'a_func(eval(sys.argv[1])())\n')
+        runner = self.pycore.run_modules(
+            [(mod, ['C1']), (mod, ['C2']), (mod, ['C1'])], processes=2)
+        runner.wait_process()
+        self.assertEquals(3, len(runner.runners))
+        self.assertEquals(0, runner.ingestor.dropped)
+        self.assertTrue(runner.ingestor.duplicates > 0)
+        calls = self.pycore.object_info.objectdb.get_callinfos('mod.py',
+                                                               'a_func')
+        self.assertEquals(2, len(list(calls)))
+
+    def test_moving_modules_before_validating_their_data(self):
+        self.project.prefs['save_objectdb'] = True
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod2.write('class C(object):\n    pass\n')
+        mod = testutils.create_module(self.project, 'mod')
+        code = 'import mod2\ndef a_func(arg):\n    return eval(arg)\n' \
+               'a_var = a_func("mod2.C")\n'
+        mod.write(code)
+        self.pycore.run_module(mod).wait_process()
+        self.project.close()
+        project = rope.base.project.Project(
+            self.project.address, save_objectdb=True, validate_objectdb=True)
+        try:
+            project.get_file('mod.py').move('newmod.py')
+            pymod = project.pycore.get_module('newmod')
+            pymod2 = project.pycore.get_module('mod2')
+            self.assertEquals(pymod2['C'].get_object(),
+                              pymod['a_var'].get_object())
+        finally:
+            project.close()
+
+    def test_changing_modules_before_validating_their_data(self):
+        self.project.prefs['save_objectdb'] = True
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('def a_func(arg):\n    return arg\na_func(1)\n')
+        self.pycore.run_module(mod).wait_process()
+        self.project.close()
+        project = rope.base.project.Project(
+            self.project.address, save_objectdb=True, validate_objectdb=True)
+        try:
+            objectdb = project.pycore.object_info.objectdb
+            self.assertEquals(['a_func'], list(objectdb.files['mod.py']))
+            project.get_file('mod.py').write('def b_func(arg):\n    pass\n')
+            self.assertTrue(objectdb.is_checked('mod.py'))
+            self.assertEquals([], list(objectdb.files['mod.py']))
+        finally:
+            project.close()
+
 
 class NewStaticOITest(unittest.TestCase):
 
@@ -677,6 +896,108 @@ class NewStaticOITest(unittest.TestCase):
         p_type = f_scope['p'].get_object().get_type()
         self.assertEquals(c_class, p_type)
 
+    def test_analyzing_all_modules_in_worker_processes(self):
+        code = 'class C(object):\n    pass\ndef f(p):\n    pass\nf(C())\n'
+        self.mod.write(code)
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod2.write('import mod\nclass D(object):\n    pass\n'
+                   'def g(p):\n    return p\nmod.f(g(D()))\n')
+        rope.base.libutils.analyze_modules(self.project, processes=2)
+        pymod = self.pycore.resource_to_pyobject(self.mod)
+        pymod2 = self.pycore.resource_to_pyobject(mod2)
+        f_scope = pymod['f'].get_object().get_scope()
+        g_scope = pymod2['g'].get_object().get_scope()
+        self.assertEquals(pymod['C'].get_object(),
+                          f_scope['p'].get_object().get_type())
+        self.assertEquals(pymod2['D'].get_object(),
+                          g_scope['p'].get_object().get_type())
+
+    def test_analyzing_modules_in_processes_with_sqlite_storage(self):
+        testutils.remove_project(self.project)
+        self.project = testutils.sample_project(
+            objectdb_storage='sqlite', save_objectdb=True)
+        self.pycore = self.project.pycore
+        mod = testutils.create_module(self.project, 'mod')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod.write('import mod2\nclass C(object):\n    pass\n'
+                  'mod2.f(C())\n')
+        mod2.write('def f(p):\n    return p\n')
+        prefs = rope.base.parallel._get_project_args(self.project)[2]
+        self.assertEquals((False, 'pickle'), (prefs['save_objectdb'],
+                                              prefs['objectdb_storage']))
+        rope.base.libutils.analyze_modules(self.project, processes=2)
+        pymod2 = self.pycore.resource_to_pyobject(mod2)
+        p_type = pymod2['f'].get_object().get_scope()['p'].\
+                 get_object().get_type()
+        self.assertEquals(self.pycore.resource_to_pyobject(mod)['C'].
+                          get_object(), p_type)
+
+    def test_sorting_modules_by_imports(self):
+        pkg = testutils.create_package(self.project, 'pkg')
+        mod1 = testutils.create_module(self.project, 'mod1', pkg)
+        mod2 = testutils.create_module(self.project, 'mod2', pkg)
+        self.mod.write('from pkg import mod1\n')
+        mod1.write('from . import mod2\n')
+        mod2.write('import sys\n')
+        init = pkg.get_child('__init__.py')
+        resources, importers = rope.base.libutils._sort_by_imports(
+            self.pycore, [self.mod, mod1, mod2, init])
+        self.assertEquals([init, mod2, mod1, self.mod], resources)
+        self.assertEquals(set(['pkg/mod1.py']), importers['pkg/mod2.py'])
+
+    def test_analyzing_modules_until_information_does_not_change(self):
+        mod2 = testutils.create_module(self.project, 'mod2')
+        self.mod.write('import mod2\nclass C(object):\n    pass\n'
+                       'mod2.f(C())\n')
+        mod2.write('def f(p):\n    return p\n')
+        analyzed = []
+        analyze_module = self.pycore.analyze_module
+        def analyze(resource, *args, **kwds):
+            analyzed.append(resource)
+            analyze_module(resource, *args, **kwds)
+        self.pycore.analyze_module = analyze
+        rope.base.libutils.analyze_modules(self.project, passes=5)
+        self.assertEquals([mod2, self.mod, mod2, self.mod], analyzed)
+        pymod2 = self.pycore.resource_to_pyobject(mod2)
+        p_type = pymod2['f'].get_object().get_scope()['p'].\
+                 get_object().get_type()
+        self.assertEquals(self.pycore.resource_to_pyobject(self.mod)['C'].
+                          get_object(), p_type)
+
+    def test_parsing_modules_once_when_analyzing_them(self):
+        testutils.remove_project(self.project)
+        self.project = testutils.sample_project(automatic_soa=False)
+        mod = testutils.create_module(self.project, 'mod')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod.write('import mod2\nmod2.f(1)\n')
+        mod2.write('def f(p):\n    return p\n')
+        parsed = []
+        parse = rope.base.ast.parse
+        def counting_parse(source, filename='<string>'):
+            parsed.append(filename)
+            return parse(source, filename)
+        rope.base.ast.parse = counting_parse
+        try:
+            rope.base.libutils.analyze_modules(self.project)
+        finally:
+            rope.base.ast.parse = parse
+        self.assertEquals(['mod.py', 'mod2.py'], sorted(parsed))
+
+    def test_analyzing_modules_in_processes_until_no_change(self):
+        mod2 = testutils.create_module(self.project, 'mod2')
+        self.mod.write('import mod2\nclass C(object):\n    pass\n'
+                       'mod2.f(C())\n')
+        mod2.write('def f(p):\n    return p\n')
+        handle = rope.base.taskhandle.TaskHandle()
+        rope.base.libutils.analyze_modules(self.project, handle,
+                                           processes=2, passes=5)
+        self.assertEquals(2, len(handle.get_jobsets()))
+        pymod2 = self.pycore.resource_to_pyobject(mod2)
+        p_type = pymod2['f'].get_object().get_scope()['p'].\
+                 get_object().get_type()
+        self.assertEquals(self.pycore.resource_to_pyobject(self.mod)['C'].
+                          get_object(), p_type)
+
     def test_validation_problems_for_objectdb_retrievals(self):
         mod1 = testutils.create_module(self.project, 'mod1')
         mod2 = testutils.create_module(self.project, 'mod2')
@@ -729,10 +1050,82 @@ class NewStaticOITest(unittest.TestCase):
         self.assertEquals(a_class, x_var)
 
 
+class TransformTest(unittest.TestCase):
+
+    def setUp(self):
+        super(TransformTest, self).setUp()
+        self.project = testutils.sample_project()
+        self.pycore = self.project.pycore
+        self.to_pyobject = self.pycore.object_info.to_pyobject
+        self.to_textual = self.pycore.object_info.to_textual
+
+    def tearDown(self):
+        testutils.remove_project(self.project)
+        super(TransformTest, self).tearDown()
+
+    def test_transforming_to_pyobjects_and_back(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('class C(object):\n    pass\n')
+        pyclass = self.to_pyobject(('defined', 'mod.py', 'C'))
+        pymod = self.pycore.resource_to_pyobject(mod)
+        self.assertEquals(pymod['C'].get_object(), pyclass)
+        self.assertEquals(('defined', 'mod.py', 'C'),
+                          self.to_textual(pyclass))
+
+    def test_remembering_transformed_objects(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('class C(object):\n    pass\n')
+        textual = ('instance', ('defined', 'mod.py', 'C'))
+        self.assertTrue(self.to_pyobject(textual) is
+                        self.to_pyobject(textual))
+
+    def test_forgetting_transformed_objects_after_changes(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('class C(object):\n    pass\n')
+        old_class = self.to_pyobject(('defined', 'mod.py', 'C'))
+        mod.write('class C(object):\n    pass\nclass D(object):\n    pass\n')
+        new_class = self.to_pyobject(('defined', 'mod.py', 'C'))
+        self.assertNotEquals(old_class, new_class)
+        self.assertEquals(('defined', 'mod.py', 'D'), self.to_textual(
+                          self.to_pyobject(('defined', 'mod.py', 'D'))))
+
+    def test_forgetting_resolved_paths_after_changes(self):
+        self.assertEquals(None, self.to_pyobject.path_to_resource('mod.py'))
+        mod = testutils.create_module(self.project, 'mod')
+        self.assertEquals(mod, self.to_pyobject.path_to_resource('mod.py'))
+        mod.move('newmod.py')
+        self.assertEquals(None, self.to_pyobject.path_to_resource('mod.py'))
+
+    def test_forgetting_textual_forms_after_moves(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('def a_func():\n    pass\n')
+        pymod = self.pycore.resource_to_pyobject(mod)
+        pyfunction = pymod['a_func'].get_object()
+        self.assertEquals(('defined', 'mod.py', 'a_func'),
+                          self.to_textual(pyfunction))
+        mod.move('newmod.py')
+        pymod = self.pycore.get_module('newmod')
+        self.assertEquals(('defined', 'newmod.py', 'a_func'),
+                          self.to_textual(pymod['a_func'].get_object()))
+
+    def test_not_remembering_objects_of_string_modules(self):
+        pymod = self.pycore.get_string_module('def a_func():\n    pass\n')
+        self.to_textual(pymod['a_func'].get_object())
+        self.assertEquals({}, self.to_textual.memo.results)
+
+    def test_limiting_the_number_of_remembered_objects(self):
+        memo = rope.base.oi.transform._Memo(lambda: 0)
+        memo.max_results = 2
+        memo.get_results()[1] = 1
+        memo.get_results()[2] = 2
+        self.assertEquals({}, memo.get_results())
+
+
 def suite():
     result = unittest.TestSuite()
     result.addTests(unittest.makeSuite(DynamicOITest))
     result.addTests(unittest.makeSuite(NewStaticOITest))
+    result.addTests(unittest.makeSuite(TransformTest))
     return result
 
 
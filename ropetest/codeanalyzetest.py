@@ -44,6 +44,17 @@ class SourceLinesAdapterTest(unittest.TestCase):
         to_lines = SourceLinesAdapter('line1')
         self.assertEquals(1, to_lines.get_line_number(5))
 
+    def test_source_lines_for_empty_sources(self):
+        to_lines = SourceLinesAdapter('')
+        self.assertEquals(1, to_lines.length())
+        self.assertEquals('', to_lines.get_line(1))
+
+    def test_source_lines_and_other_line_separators(self):
+        to_lines = SourceLinesAdapter(u'a\x0cb\u2028c\nd\n')
+        self.assertEquals(3, to_lines.length())
+        self.assertEquals(u'a\x0cb\u2028c', to_lines.get_line(1))
+        self.assertEquals(2, to_lines.get_line_number(7))
+
 
 class WordRangeFinderTest(unittest.TestCase):
 
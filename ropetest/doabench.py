@@ -0,0 +1,70 @@
+"""Compare the time of running a module with and without DOA
+
+Run it as ``python -m ropetest.doabench [iterations]``.  The sample
+module is run without dynamic object analysis, with every call traced
+(``max_doa_samples = 0``) and with the calls collected in batches.
+
+"""
+import sys
+import time
+
+from ropetest import testutils
+
+
+code = '''\
+class Point(object):
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def moved(self, dx, dy):
+        return Point(self.x + dx, self.y + dy)
+
+
+def distance(p1, p2):
+    return abs(p1.x - p2.x) + abs(p1.y - p2.y)
+
+
+def walk(count):
+    point = Point(0, 0)
+    total = 0
+    for i in range(count):
+        new_point = point.moved(i %% 3, i %% 5)
+        total += distance(point, new_point)
+        point = new_point
+    return [point, total]
+
+
+walk(%d)
+'''
+
+
+def run(project, mod, perform_doa, max_samples=0):
+    project.prefs['perform_doa'] = perform_doa
+    project.prefs['max_doa_samples'] = max_samples
+    start = time.time()
+    project.pycore.run_module(mod).wait_process()
+    return time.time() - start
+
+
+def main(iterations=20000):
+    project = testutils.sample_project()
+    try:
+        mod = testutils.create_module(project, 'walk')
+        mod.write(code % iterations)
+        untraced = run(project, mod, False)
+        print 'without doa:   %.3fs' % untraced
+        for name, samples in [('every call', 0), ('batched', 32)]:
+            traced = run(project, mod, True, samples)
+            print '%-14s %.3fs (%.1fx)' % (name + ':', traced,
+                                          traced / max(untraced, 0.001))
+    finally:
+        testutils.remove_project(project)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -1,6 +1,6 @@
 import unittest
 
-from rope.base.oi import objectdb, memorydb
+from rope.base.oi import objectdb, memorydb, sqlitedb
 from ropetest import testutils
 
 
@@ -22,6 +22,9 @@ class _MockValidation(object):
     def is_file_valid(self, path):
         return path != 'invalid'
 
+    def is_file_valid_in_thread(self, path):
+        return path != 'invalid'
+
     def is_scope_valid(self, path, key):
         return path != 'invalid' and key != 'invalid'
 
@@ -45,6 +48,9 @@ class ObjectDBTest(unittest.TestCase):
         validation = _MockValidation()
         self.dbs = [
             objectdb.ObjectDB(memorydb.MemoryDB(self.project), validation)]
+        if sqlitedb.is_available():
+            self.dbs.append(objectdb.ObjectDB(
+                sqlitedb.SQLiteDB(self.project), validation))
 
     def tearDown(self):
         for db in self.dbs:
@@ -149,10 +155,190 @@ class ObjectDBTest(unittest.TestCase):
         db.validate_files()
         self.assertEquals('removed invalid ', observer.log)
 
+    @_do_for_all_dbs
+    def test_limiting_call_infos(self, db):
+        db.max_calls = 4
+        for i in range(10):
+            db.add_callinfo('file', 'key', (i,), i)
+        db.add_callinfo('file', 'key', (6,), 6)
+        calls = set(call.get_parameters()
+                    for call in db.get_callinfos('file', 'key'))
+        self.assertEquals(set([(6,), (7,), (8,), (9,)]), calls)
+
+    @_do_for_all_dbs
+    def test_sharing_textual_forms(self, db):
+        db.add_callinfo('file', 'key1', (('defined', 'mod.py', '1'),), 3)
+        db.add_callinfo('file', 'key2', (('defined', 'mod.py', '1'),), 3)
+        args1 = list(db.get_callinfos('file', 'key1'))[0].get_parameters()
+        args2 = list(db.get_callinfos('file', 'key2'))[0].get_parameters()
+        self.assertTrue(args1 is args2)
+
+    @_do_for_all_dbs
+    def test_recording_and_applying_deltas(self, db):
+        other = objectdb.ObjectDB(memorydb.MemoryDB(self.project),
+                                  _MockValidation())
+        other.delta = []
+        other.add_callinfo('file', 'key', (1, 2), 3)
+        other.add_pername('file', 'key', 'name', 4)
+        db.apply_delta(other.delta)
+        self.assertEquals(3, db.get_returned('file', 'key', (1, 2)))
+        self.assertEquals(4, db.get_pername('file', 'key', 'name'))
+
+    @_do_for_all_dbs
+    def test_not_applying_less_valid_deltas(self, db):
+        db.add_callinfo('file', 'key', (1, 2), 3)
+        db.apply_delta([('call', 'file', 'key', (1, 2), -1),
+                        ('pername', 'file', 'key', 'name', -1)])
+        self.assertEquals(3, db.get_returned('file', 'key', (1, 2)))
+        self.assertEquals(None, db.get_pername('file', 'key', 'name'))
+
+    @_do_for_all_dbs
+    def test_validating_files_lazily(self, db):
+        db.add_callinfo('invalid', 'key', (1, 2), 3)
+        db.add_callinfo('file', 'key', (1, 2), 3)
+        observer = _MockFileListObserver()
+        db.add_file_list_observer(observer)
+        db.validate_files_lazily()
+        self.assertEquals(2, len(db.get_files()))
+        self.assertEquals(0, len(list(db.get_callinfos('invalid', 'key'))))
+        self.assertEquals(1, len(list(db.get_callinfos('file', 'key'))))
+        self.assertEquals(['file'], db.get_files())
+        self.assertEquals('removed invalid added file ', observer.log)
+
+    @_do_for_all_dbs
+    def test_validating_files_lazily_in_background(self, db):
+        db.add_callinfo('invalid', 'key', (1, 2), 3)
+        db.validate_files_lazily(background=True)
+        db.add_callinfo('file', 'key', (1, 2), 3)
+        db._validation_thread.join()
+        db.write()
+        self.assertEquals(['file'], db.get_files())
+
+    @_do_for_all_dbs
+    def test_starting_background_validation_when_first_used(self, db):
+        db.add_callinfo('invalid', 'key', (1, 2), 3)
+        db.validate_files_lazily(background=True)
+        self.assertTrue(db._validation_thread is None)
+        db.get_returned('file', 'key', ())
+        self.assertTrue(db._validation_thread is not None)
+
+    @_do_for_all_dbs
+    def test_moving_files_not_validated_yet(self, db):
+        db.add_callinfo('file', 'key', (1, 2), 3)
+        db.validate_files_lazily()
+        db.file_moved('file', 'newfile')
+        self.assertTrue(db.is_checked('newfile'))
+        self.assertEquals(1, len(list(db.get_callinfos('newfile', 'key'))))
+
+    @_do_for_all_dbs
+    def test_getting_unchecked_files(self, db):
+        db.add_callinfo('file1', 'key', (1, 2), 3)
+        db.add_callinfo('file2', 'key', (1, 2), 3)
+        db.validate_files_lazily()
+        db.get_callinfos('file1', 'key')
+        self.assertEquals(['file2'], db.get_unchecked_files())
+
+    @_do_for_all_dbs
+    def test_forgetting_shared_textual_forms_when_writing(self, db):
+        db.add_callinfo('file', 'key', (('defined', 'mod.py', '1'),), 3)
+        self.assertTrue(db._interned)
+        db.write()
+        self.assertEquals({}, db._interned)
+
+    def test_not_saving_when_calls_were_added(self):
+        scope = memorydb.ScopeInfo()
+        scope.add_call((1,), 2)
+        self.assertEquals(({(1,): 2}, {}), scope.__getstate__())
+
+
+class SQLiteDBTest(unittest.TestCase):
+
+    def setUp(self):
+        super(SQLiteDBTest, self).setUp()
+        self.project = testutils.sample_project()
+
+    def tearDown(self):
+        testutils.remove_project(self.project)
+        super(SQLiteDBTest, self).tearDown()
+
+    def _create_db(self):
+        return objectdb.ObjectDB(sqlitedb.SQLiteDB(self.project, persist=True),
+                                 _MockValidation())
+
+    def test_reading_saved_scopes_lazily(self):
+        db = self._create_db()
+        db.add_callinfo('file', 'key1', (1, 2), 3)
+        db.add_pername('file', 'key2', 'name', 4)
+        db.write()
+        db = self._create_db()
+        self.assertEquals(0, len(db.db.scopes))
+        self.assertEquals(3, db.get_returned('file', 'key1', (1, 2)))
+        self.assertEquals(1, len(db.db.scopes))
+        self.assertEquals(4, db.get_pername('file', 'key2', 'name'))
+
+    def test_writing_only_changed_scopes(self):
+        db = self._create_db()
+        db.add_callinfo('file', 'key1', (1, 2), 3)
+        db.add_callinfo('file', 'key2', (1, 2), 3)
+        db.write()
+        db.get_returned('file', 'key2', (1, 2))
+        db.add_callinfo('file', 'key1', (1, 2), 4)
+        self.assertEquals([True, False], [db.db.scopes[('file', key)].dirty
+                                          for key in ('key1', 'key2')])
+
+    def test_renaming_and_removing_saved_files(self):
+        db = self._create_db()
+        db.add_callinfo('file', 'key', (1, 2), 3)
+        db.add_callinfo('file2', 'key', (1, 2), 3)
+        db.write()
+        db = self._create_db()
+        db.file_moved('file', 'newfile')
+        del db.files['file2']
+        db.write()
+        db = self._create_db()
+        self.assertEquals(['newfile'], db.get_files())
+        self.assertEquals(3, db.get_returned('newfile', 'key', (1, 2)))
+
+    def test_not_locking_the_db_between_writes(self):
+        db = self._create_db()
+        db.add_callinfo('file', 'key', (1, 2), 3)
+        db.file_moved('file', 'newfile')
+        path = self.project.get_file('.ropeproject/objectdb.sqlite').real_path
+        other = sqlitedb.sqlite3.connect(path, timeout=0)
+        try:
+            other.execute('INSERT INTO files (path) VALUES (?)', ('other',))
+            other.commit()
+        finally:
+            other.close()
+        self.assertEquals(set(['newfile', 'other']), set(db.get_files()))
+
+    def test_importing_pickled_objectdbs(self):
+        old_db = objectdb.ObjectDB(memorydb.MemoryDB(self.project, True),
+                                   _MockValidation())
+        old_db.add_callinfo('file', 'key', (1, 2), 3)
+        old_db.write()
+        db = self._create_db()
+        self.assertEquals(3, db.get_returned('file', 'key', (1, 2)))
+
+    def test_using_sqlite_storage_in_projects(self):
+        testutils.remove_project(self.project)
+        self.project = testutils.sample_project(objectdb_storage='sqlite',
+                                                save_objectdb=True)
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('def f():\n    return 1\na = f()\n')
+        self.project.pycore.analyze_module(mod)
+        self.project.close()
+        self.assertTrue(self.project.get_file(
+                        '.ropeproject/objectdb.sqlite').exists())
+        self.assertFalse(self.project.get_file(
+                         '.ropeproject/objectdb').exists())
+
 
 def suite():
     result = unittest.TestSuite()
     result.addTests(unittest.makeSuite(ObjectDBTest))
+    if sqlitedb.is_available():
+        result.addTests(unittest.makeSuite(SQLiteDBTest))
     return result
 
 
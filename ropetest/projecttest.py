@@ -1,4 +1,5 @@
 import os.path
+import time
 import unittest
 
 from rope.base.exceptions import RopeError, ResourceNotFoundError
@@ -7,6 +8,7 @@ from rope.base.libutils import path_to_resource
 from rope.base.project import Project, NoProject, _realpath
 from ropetest import testutils
 from rope.base.resourceobserver import ResourceObserver, FilteredResourceObserver
+from rope.base.watcher import Watcher
 
 
 
@@ -263,6 +265,31 @@ class ProjectTest(unittest.TestCase):
         self.project.get_file('newfile.txt').remove()
         self.assertEquals(1, len(self.project.get_files()))
 
+    def test_get_all_files_after_moving_folders(self):
+        folder = self.project.root.create_folder('folder')
+        folder.create_file('mod.txt')
+        self.assertEquals(2, len(self.project.get_files()))
+        folder.move('newfolder')
+        self.assertEquals(
+            set([self.project.get_file(self.sample_file),
+                 self.project.get_file('newfolder/mod.txt')]),
+            set(self.project.get_files()))
+        self.project.get_folder('newfolder').remove()
+        self.assertEquals(1, len(self.project.get_files()))
+
+    def test_get_all_files_not_changing_the_returned_set(self):
+        files = self.project.get_files()
+        self.project.root.create_file('myfile.txt')
+        self.assertEquals(1, len(files))
+        self.assertEquals(2, len(self.project.get_files()))
+
+    def test_get_all_files_after_validation(self):
+        self.assertEquals(1, len(self.project.get_files()))
+        open(os.path.join(self.project.address, 'myfile.txt'), 'w').close()
+        self.assertEquals(1, len(self.project.get_files()))
+        self.project.validate()
+        self.assertEquals(2, len(self.project.get_files()))
+
     def test_multifile_get_all_files(self):
         fileName = 'nestedFile.txt'
         parent = self.project.get_resource(self.sample_folder)
@@ -685,6 +712,29 @@ class ResourceObserverTest(unittest.TestCase):
         self.project.validate()
         self.assertEquals(1, len(self.project.get_files()))
 
+    def test_validating_removed_folders_and_their_children(self):
+        my_folder = self.project.root.create_folder('my_folder')
+        my_file = my_folder.create_file('my_file.txt')
+        other = self.project.root.create_file('my_folder2')
+        sample_observer = _SampleObserver()
+        self.project.add_observer(FilteredResourceObserver(
+                                  sample_observer, [my_folder, my_file, other]))
+        testutils.remove_recursively(my_folder.real_path)
+        self.project.validate(self.project.root)
+        self.assertEquals(2, sample_observer.change_count)
+        self.assertNotEquals(other, sample_observer.last_removed)
+
+    def test_not_reporting_removed_resources_in_moved_folders(self):
+        my_folder = self.project.root.create_folder('my_folder')
+        my_file = my_folder.create_file('my_file.txt')
+        sample_observer = _SampleObserver()
+        filtered_observer = FilteredResourceObserver(sample_observer,
+                                                     [my_file])
+        self.project.add_observer(filtered_observer)
+        filtered_observer.remove_resource(my_file)
+        my_folder.move('new_folder')
+        self.assertEquals(0, sample_observer.change_count)
+
     def test_clear_observered_resources_for_filtered_observers(self):
         sample_file = self.project.root.create_file('myfile.txt')
         sample_observer = _SampleObserver()
@@ -870,6 +920,46 @@ class RopeFolderTest(unittest.TestCase):
         myfile = self.project.root.create_file('myfile.txt')
         self.assertEquals(0, len(self.project.get_files()))
 
+    def test_ignored_folders_and_get_files(self):
+        self.project = testutils.sample_project(
+            ignored_resources=['myfolder'], ropefolder=None)
+        os.makedirs(os.path.join(self.project.address, 'myfolder', 'sub'))
+        open(os.path.join(self.project.address,
+                          'myfolder', 'sub', 'mod.py'), 'w').close()
+        myfile = self.project.root.create_file('myfile.txt')
+        self.assertEquals([myfile], list(self.project.get_files()))
+
+    @testutils.run_only_for_unix
+    def test_including_files_in_symlinked_folders_in_get_files(self):
+        self.project = testutils.sample_project(ropefolder=None)
+        folder = self.project.root.create_folder('folder')
+        myfile = folder.create_file('myfile.txt')
+        os.symlink(folder.real_path,
+                   os.path.join(self.project.address, 'linked'))
+        self.project.validate()
+        self.assertEquals(set([myfile,
+                               self.project.get_file('linked/myfile.txt')]),
+                          set(self.project.get_files()))
+
+    @testutils.run_only_for_unix
+    def test_symlinked_folders_that_link_to_their_parents(self):
+        self.project = testutils.sample_project(ropefolder=None)
+        folder = self.project.root.create_folder('folder')
+        myfile = folder.create_file('myfile.txt')
+        os.symlink(folder.real_path, os.path.join(folder.real_path, 'loop'))
+        self.project.validate()
+        self.assertTrue(myfile in self.project.get_files())
+
+    @testutils.run_only_for_unix
+    def test_noticing_new_symlinks_after_validation(self):
+        self.project = testutils.sample_project(ropefolder=None)
+        myfile = self.project.root.create_file('myfile.txt')
+        link = self.project.get_file('link.txt')
+        self.assertFalse(self.project.is_ignored(link))
+        os.symlink(myfile.real_path, link.real_path)
+        self.project.validate()
+        self.assertTrue(self.project.is_ignored(link))
+
     def test_setting_ignored_resources_patterns(self):
         self.project = testutils.sample_project(ignored_resources=['m?file.*'])
         myfile = self.project.get_file('myfile.txt')
@@ -885,6 +975,28 @@ class RopeFolderTest(unittest.TestCase):
         self.assertFalse(self.project.is_ignored(file1))
         self.assertTrue(self.project.is_ignored(file2))
 
+    def test_ignored_resources_and_many_patterns(self):
+        patterns = ['file%s.txt' % index for index in range(200)]
+        self.project = testutils.sample_project(ignored_resources=patterns)
+        self.assertTrue(self.project.is_ignored(
+                        self.project.get_file('file150.txt')))
+        self.assertFalse(self.project.is_ignored(
+                         self.project.get_file('file200.txt')))
+
+    def test_filtering_paths_with_ignored_resources(self):
+        self.project = testutils.sample_project(
+            ignored_resources=['*.pyc', 'build'])
+        paths = ['mod.py', 'mod.pyc', 'build/mod.py', 'pkg/build', 'link.py']
+        self.assertEquals(
+            ['mod.py'], self.project.ignored.filter(paths, set(['link.py'])))
+
+    def test_changing_ignored_resources(self):
+        self.project = testutils.sample_project(ignored_resources=['a.txt'])
+        myfile = self.project.get_file('a.txt')
+        self.assertTrue(self.project.is_ignored(myfile))
+        self.project.prefs['ignored_resources'] = ['b.txt']
+        self.assertFalse(self.project.is_ignored(myfile))
+
     def test_normal_fscommands(self):
         fscommands = _MockFSCommands()
         self.project = testutils.sample_project(fscommands=fscommands)
@@ -946,12 +1058,120 @@ class RopeFolderTest(unittest.TestCase):
         self.assertTrue(ropefolder.exists())
 
 
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        super(WatcherTest, self).setUp()
+        self.project = testutils.sample_project()
+        self.watcher = Watcher(self.project)
+        self.watcher.check()
+
+    def tearDown(self):
+        self.watcher.stop()
+        testutils.remove_project(self.project)
+        super(WatcherTest, self).tearDown()
+
+    def _write_file(self, path, contents=''):
+        my_file = open(os.path.join(self.project.address, path), 'w')
+        my_file.write(contents)
+        my_file.close()
+
+    def test_reporting_created_files(self):
+        self.assertEquals(0, len(self.project.get_files()))
+        self._write_file('myfile.txt')
+        self.watcher.check()
+        self.assertEquals([self.project.get_file('myfile.txt')],
+                          list(self.project.get_files()))
+
+    def test_reporting_changed_files(self):
+        my_file = self.project.root.create_file('myfile.txt')
+        sample_observer = _SampleObserver()
+        self.project.add_observer(FilteredResourceObserver(sample_observer,
+                                                           [my_file]))
+        self._write_file('myfile.txt', 'new contents\n')
+        self.watcher.check()
+        self.assertEquals(1, sample_observer.change_count)
+        self.assertEquals(my_file, sample_observer.last_changed)
+
+    def test_reporting_removed_folders(self):
+        folder = self.project.root.create_folder('folder')
+        my_file = folder.create_file('myfile.txt')
+        sample_observer = _SampleObserver()
+        self.project.add_observer(FilteredResourceObserver(sample_observer,
+                                                           [my_file]))
+        testutils.remove_recursively(folder.real_path)
+        self.watcher.check()
+        self.assertEquals(my_file, sample_observer.last_removed)
+        self.assertEquals(0, len(self.project.get_files()))
+
+    def test_reporting_files_in_created_folders(self):
+        os.makedirs(os.path.join(self.project.address, 'folder', 'sub'))
+        self._write_file('folder/sub/mod.py')
+        self.watcher.check()
+        self.assertEquals([self.project.get_file('folder/sub/mod.py')],
+                          list(self.project.get_files()))
+
+    def test_not_reporting_changes_made_by_rope(self):
+        my_file = self.project.root.create_file('myfile.txt')
+        my_file.write('contents\n')
+        self.project.root.create_folder('folder').create_file('mod.py')
+        self.watcher.scan()
+        self.assertEquals(0, self.watcher.report_changes())
+
+    def test_not_reporting_ignored_files(self):
+        self._write_file('mod.pyc')
+        self.watcher.scan()
+        self.assertEquals(0, self.watcher.report_changes())
+
+    def test_checking_some_of_the_files_in_each_scan(self):
+        self.project.root.create_file('file1.txt')
+        self.project.root.create_file('file2.txt')
+        self._write_file('file1.txt', 'new contents\n')
+        self._write_file('file2.txt', 'new contents\n')
+        self.watcher.scan(1)
+        self.assertEquals(1, self.watcher.report_changes())
+        self.watcher.scan(1)
+        self.assertEquals(1, self.watcher.report_changes())
+        self.watcher.scan(1)
+        self.assertEquals(0, self.watcher.report_changes())
+
+    def test_not_holding_the_lock_when_reading_files(self):
+        self.project.root.create_file('file1.txt')
+        self._write_file('file2.txt')
+        locked = []
+        get_indicator = self.watcher._get_indicator
+        def indicator(path):
+            locked.append(self.watcher._lock.locked())
+            return get_indicator(path)
+        self.watcher._get_indicator = indicator
+        self.watcher.scan()
+        self.assertEquals(1, self.watcher.report_changes())
+        self.assertTrue(locked)
+        self.assertFalse(True in locked)
+
+    def test_scanning_in_a_background_thread(self):
+        watcher = Watcher(self.project, interval=0.01)
+        watcher.start()
+        try:
+            watcher.scan()
+            self._write_file('myfile.txt')
+            for i in range(100):
+                if not watcher.queue.empty():
+                    break
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+        self.assertEquals(1, watcher.report_changes())
+        self.assertEquals(1, len(self.project.get_files()))
+
+
 def suite():
     result = unittest.TestSuite()
     result.addTests(unittest.makeSuite(ProjectTest))
     result.addTests(unittest.makeSuite(ResourceObserverTest))
     result.addTests(unittest.makeSuite(OutOfProjectTest))
     result.addTests(unittest.makeSuite(RopeFolderTest))
+    result.addTests(unittest.makeSuite(WatcherTest))
     return result
 
 if __name__ == '__main__':
@@ -1,7 +1,10 @@
+import os.path
 import sys
+import threading
 import unittest
 
-from rope.base import exceptions
+import rope.base.project
+from rope.base import ast, exceptions
 from rope.base.pycore import _TextChangeDetector
 from rope.base.pyobjects import get_base_type, AbstractFunction
 from ropetest import testutils
@@ -24,6 +27,23 @@ class PyCoreTest(unittest.TestCase):
         self.assertEquals(get_base_type('Module'), result.type)
         self.assertEquals(0, len(result.get_attributes()))
 
+    def test_creating_modules_holding_the_object_info_lock(self):
+        mod = testutils.create_module(self.project, 'mod')
+        self.assertTrue(self.pycore.object_info.lock is self.pycore.lock)
+        result = []
+        def create_module():
+            result.append(self.pycore.resource_to_pyobject(mod))
+        thread = threading.Thread(target=create_module)
+        self.pycore.lock.acquire()
+        try:
+            thread.start()
+            thread.join(0.1)
+            self.assertEquals([], result)
+        finally:
+            self.pycore.lock.release()
+        thread.join()
+        self.assertEquals(1, len(result))
+
     def test_nested_modules(self):
         pkg = testutils.create_package(self.project, 'pkg')
         mod = testutils.create_module(self.project, 'mod', pkg)
@@ -267,6 +287,45 @@ class PyCoreTest(unittest.TestCase):
         found_module = self.pycore.find_module('sample')
         self.assertEquals(samplepkg, found_module)
 
+    def test_find_module_after_creating_it(self):
+        self.assertEquals(None, self.pycore.find_module('samplemod'))
+        samplemod = testutils.create_module(self.project, 'samplemod')
+        self.assertEquals(samplemod, self.pycore.find_module('samplemod'))
+
+    def test_find_module_after_creating_its_source_folder(self):
+        self.assertEquals([], self.pycore.get_source_folders())
+        src = self.project.root.create_folder('src')
+        samplemod = testutils.create_module(self.project, 'samplemod', src)
+        self.assertEquals([src], self.pycore.get_source_folders())
+        self.assertEquals(samplemod, self.pycore.find_module('samplemod'))
+
+    def test_find_module_after_moving_it(self):
+        samplemod = testutils.create_module(self.project, 'samplemod')
+        self.assertEquals(samplemod, self.pycore.find_module('samplemod'))
+        samplemod.move('newmod.py')
+        self.assertEquals(None, self.pycore.find_module('samplemod'))
+        self.assertEquals(self.project.get_resource('newmod.py'),
+                          self.pycore.find_module('newmod'))
+
+    def test_find_module_after_validation(self):
+        self.assertEquals(None, self.pycore.find_module('samplemod'))
+        open(os.path.join(self.project.address, 'samplemod.py'), 'w').close()
+        self.project.validate(self.project.root)
+        self.assertEquals(self.project.get_resource('samplemod.py'),
+                          self.pycore.find_module('samplemod'))
+
+    def test_find_module_after_changing_python_path(self):
+        project2 = testutils.sample_project(foldername='sampleproject2')
+        try:
+            lib = project2.root.create_folder('lib')
+            lib.create_file('extmod.py')
+            self.assertEquals(None, self.pycore.find_module('extmod'))
+            self.project.prefs['python_path'] = [lib.real_path]
+            module = self.pycore.find_module('extmod')
+            self.assertEquals('extmod.py', module.name)
+        finally:
+            testutils.remove_project(project2)
+
     def test_source_folders_preference(self):
         pkg1 = testutils.create_package(self.project, 'pkg1')
         src2 = testutils.create_package(self.project, 'pkg1.src2')
@@ -998,6 +1057,32 @@ class PyCoreInProjectsTest(unittest.TestCase):
         mod1.write('class A(object):\n    def func2(self):\n        pass\n')
         self.assertTrue('func2' in b_class)
 
+    def test_invalidating_superclasses_of_indirect_imports_after_change(self):
+        mod1 = testutils.create_module(self.project, 'mod1')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod3 = testutils.create_module(self.project, 'mod3')
+        mod1.write('class A(object):\n    def func1(self):\n        pass\n')
+        mod2.write('from mod1 import A\n')
+        mod3.write('import mod2\nclass B(mod2.A):\n    pass\n')
+        b_class = self.pycore.get_module('mod3')['B'].get_object()
+        self.assertTrue('func1' in b_class)
+        mod1.write('class A(object):\n    def func2(self):\n        pass\n')
+        self.assertTrue('func2' in b_class)
+
+    def test_not_forgetting_data_of_unrelated_modules(self):
+        mod1 = testutils.create_module(self.project, 'mod1')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod3 = testutils.create_module(self.project, 'mod3')
+        mod1.write('a_var = 1\n')
+        mod2.write('import mod1\n')
+        mod3.write('b_var = 1\n')
+        self.pycore.get_module('mod2')['mod1'].get_object()
+        self.pycore.get_module('mod3')
+        module_cache = self.pycore.module_cache
+        forgotten = module_cache.forgotten
+        mod1.write('a_var = 2\n')
+        self.assertEquals(2, module_cache.forgotten - forgotten)
+
     def test_caching_pymodule_with_syntax_errors(self):
         self.project.prefs['ignore_syntax_errors'] = True
         self.project.prefs['automatic_soa'] = True
@@ -1097,12 +1182,190 @@ class PyCoreProjectConfigsTest(unittest.TestCase):
         self.project.pycore.resource_to_pyobject(pkg, force_errors=True)
 
 
+class NameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        super(NameIndexTest, self).setUp()
+        self.project = testutils.sample_project()
+        self.index = self.project.pycore.name_index
+
+    def tearDown(self):
+        testutils.remove_project(self.project)
+        super(NameIndexTest, self).tearDown()
+
+    def test_simple_name_lookup(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('def a_func():\n    pass\n')
+        self.assertTrue(self.index.contains(mod, 'a_func'))
+        self.assertFalse(self.index.contains(mod, 'another_func'))
+
+    def test_names_in_comments_and_strings(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('# a_var\nprint "another_var"\n')
+        self.assertTrue(self.index.contains(mod, 'a_var'))
+        self.assertTrue(self.index.contains(mod, 'another_var'))
+
+    def test_not_matching_parts_of_names(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.assertFalse(self.index.contains(mod, 'var'))
+
+    def test_updating_index_after_changes(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.assertFalse(self.index.contains(mod, 'b_var'))
+        mod.write('b_var = 1\n')
+        self.assertTrue(self.index.contains(mod, 'b_var'))
+        self.assertFalse(self.index.contains(mod, 'a_var'))
+
+    def test_updating_index_after_moves(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.assertTrue(self.index.contains(mod, 'a_var'))
+        mod.move('newmod.py')
+        newmod = self.project.get_resource('newmod.py')
+        self.assertTrue(self.index.contains(newmod, 'a_var'))
+
+    def test_updating_index_after_validation(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.assertFalse(self.index.contains(mod, 'b_var'))
+        output = open(mod.real_path, 'w')
+        output.write('b_var = 1\n# some more text\n')
+        output.close()
+        self.project.validate(self.project.root)
+        self.assertTrue(self.index.contains(mod, 'b_var'))
+
+    def test_filtering_resources(self):
+        mod1 = testutils.create_module(self.project, 'mod1')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod3 = testutils.create_module(self.project, 'mod3')
+        mod1.write('a_var = 1\n')
+        mod2.write('b_var = 1\n')
+        mod3.write('c_var = 1\n')
+        self.assertEquals([mod1], self.index.filter_resources(
+                          [mod1, mod2, mod3], 'a_var'))
+        self.assertEquals([mod1, mod3], self.index.filter_resources(
+                          [mod1, mod2, mod3], 'a_var', 'c_var'))
+
+    def test_not_filtering_resources_for_non_identifiers(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.assertEquals([mod], self.index.filter_resources([mod], 'a.b'))
+
+    def test_saving_the_index(self):
+        self.project = testutils.sample_project(save_nameindex=True)
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.assertTrue(self.project.pycore.name_index.contains(mod, 'a_var'))
+        self.project.close()
+        self.assertTrue(self.project.ropefolder.has_child('nameindex'))
+        project = rope.base.project.Project(self.project.address,
+                                            save_nameindex=True)
+        try:
+            index = project.pycore.name_index
+            self.assertTrue('mod.py' in index.files)
+            self.assertTrue(index.contains(project.get_resource('mod.py'),
+                                           'a_var'))
+        finally:
+            project.close()
+
+
+class ModuleSummariesTest(unittest.TestCase):
+
+    def setUp(self):
+        super(ModuleSummariesTest, self).setUp()
+        self.project = testutils.sample_project(save_module_summaries=True)
+        self.pycore = self.project.pycore
+        self.other_project = None
+
+    def tearDown(self):
+        if self.other_project is not None:
+            self.other_project.close()
+        testutils.remove_project(self.project)
+        super(ModuleSummariesTest, self).tearDown()
+
+    def _reopen_project(self):
+        self.project.close()
+        self.other_project = rope.base.project.Project(
+            self.project.address, save_module_summaries=True)
+        return self.other_project.pycore
+
+    def _get_summary(self, pycore, resource):
+        return pycore.module_cache.summaries.get(resource,
+                                                 resource.read_bytes())
+
+    def test_summary_of_global_imports(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('import os\nfrom sys import path\n'
+                  'a_var = 1\ndef a_func():\n    import re\n')
+        self.pycore.resource_to_pyobject(mod)
+        summary = self._get_summary(self.pycore, mod)
+        self.assertEquals(None, summary.error)
+        self.assertEquals([('os', 0, None), ('sys', 0, ['path'])],
+                          summary.imports)
+
+    def test_summary_of_conditional_imports(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('try:\n    import json\nexcept ImportError:\n'
+                  '    json = None\n')
+        self.pycore.resource_to_pyobject(mod)
+        summary = self._get_summary(self.pycore, mod)
+        self.assertEquals([('json', 0, None)], summary.imports)
+
+    def test_not_using_summaries_of_changed_modules(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.pycore.resource_to_pyobject(mod)
+        mod.write('b_var = 1\n')
+        self.assertEquals(None, self.pycore.module_cache.summaries.get(
+                          mod, 'a_var = 2\n'))
+
+    def test_parsing_unchanged_modules_lazily(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = 1\n')
+        self.pycore.resource_to_pyobject(mod)
+        pycore = self._reopen_project()
+        pymod = pycore.resource_to_pyobject(pycore.project.get_file('mod.py'))
+        self.assertTrue(pymod._source_bytes is not None)
+        self.assertTrue('a_var' in pymod)
+        self.assertTrue(pymod._source_bytes is None)
+
+    def test_reporting_syntax_errors_of_unchanged_modules(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = \n')
+        try:
+            self.pycore.resource_to_pyobject(mod)
+        except exceptions.ModuleSyntaxError:
+            pass
+        pycore = self._reopen_project()
+        try:
+            pycore.resource_to_pyobject(pycore.project.get_file('mod.py'))
+            self.fail('should have failed')
+        except exceptions.ModuleSyntaxError, e:
+            self.assertEquals(1, e.lineno)
+
+    def test_reporting_syntax_errors_when_parsing_lazily(self):
+        mod = testutils.create_module(self.project, 'mod')
+        mod.write('a_var = \n')
+        self.pycore.module_cache.summaries.add(
+            mod, mod.read_bytes(), ast.parse('\n'))
+        pymod = self.pycore.resource_to_pyobject(mod)
+        try:
+            pymod.get_attributes()
+            self.fail('should have failed')
+        except exceptions.ModuleSyntaxError, e:
+            self.assertEquals(1, e.lineno)
+
+
 def suite():
     result = unittest.TestSuite()
     result.addTests(unittest.makeSuite(PyCoreTest))
     result.addTests(unittest.makeSuite(PyCoreInProjectsTest))
     result.addTests(unittest.makeSuite(TextChangeDetectorTest))
     result.addTests(unittest.makeSuite(PyCoreProjectConfigsTest))
+    result.addTests(unittest.makeSuite(NameIndexTest))
+    result.addTests(unittest.makeSuite(ModuleSummariesTest))
     return result
 
 
@@ -224,6 +224,59 @@ class PyCoreScopesTest(unittest.TestCase):
         self.assertTrue('open' not in scope.get_defined_names())
         self.assertTrue('A' in scope.get_defined_names())
 
+    def test_scope_ends(self):
+        code = 'class A(object):\n' \
+               '    def a_func(self):\n' \
+               '        pass\n' \
+               '\n' \
+               '    def b_func(self): pass\n' \
+               '    # comment\n' \
+               'def f():\n' \
+               '    if True:\n' \
+               '        x = (1,\n' \
+               '2)\n' \
+               '    def g(): pass\n' \
+               'a = 1\n'
+        scope = self.pycore.get_string_scope(code)
+        a_class, f_func = scope.get_scopes()
+        a_func, b_func = a_class.get_scopes()
+        g_func = f_func.get_scopes()[0]
+        self.assertEquals(5, a_class.get_end())
+        self.assertEquals(3, a_func.get_end())
+        self.assertEquals(5, b_func.get_end())
+        self.assertEquals(11, f_func.get_end())
+        self.assertEquals(11, g_func.get_end())
+
+    def test_get_inner_scope_for_lines_in_many_scopes(self):
+        code = 'class A(object):\n' \
+               '    def a_func(self):\n' \
+               '        def inner():\n' \
+               '            pass\n' \
+               '        return inner\n' \
+               '    def b_func(self):\n' \
+               '        pass\n' \
+               'def f():\n' \
+               '    pass\n'
+        scope = self.pycore.get_string_scope(code)
+        a_class, f_func = scope.get_scopes()
+        a_func, b_func = a_class.get_scopes()
+        inner = a_func.get_scopes()[0]
+        self.assertEquals(inner, scope.get_inner_scope_for_line(4))
+        self.assertEquals(a_func, scope.get_inner_scope_for_line(5))
+        self.assertEquals(a_func, scope.get_inner_scope_for_line(4, 4))
+        self.assertEquals(b_func, scope.get_inner_scope_for_line(6))
+        self.assertEquals(f_func, scope.get_inner_scope_for_line(9))
+        self.assertEquals(a_class, scope.get_inner_scope_for_line(7, 0))
+        self.assertEquals(b_func, scope.get_inner_scope_for_offset(
+                          code.index('pass', code.index('b_func'))))
+
+    def test_scope_ends_at_the_end_of_modules(self):
+        scope = self.pycore.get_string_scope(
+            'def f():\n    def g():\n        pass\n')
+        f_func = scope.get_scopes()[0]
+        self.assertEquals(3, f_func.get_end())
+        self.assertEquals(3, f_func.get_scopes()[0].get_end())
+
 
 def suite():
     result = unittest.TestSuite()
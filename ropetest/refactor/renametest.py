@@ -573,6 +573,29 @@ class RenameRefactoringTest(unittest.TestCase):
         self.assertEquals('def f():\n    pass\n', mod1.read())
         self.assertEquals('import mod1\nmod1.g()\n', mod2.read())
 
+    def test_collecting_changes_in_worker_processes(self):
+        mod1 = testutils.create_module(self.project, 'mod1')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod3 = testutils.create_module(self.project, 'mod3')
+        mod1.write('def f():\n    pass\n')
+        mod2.write('import mod1\nmod1.f()\n')
+        mod3.write('from mod1 import f\nf()\n')
+        self._rename(mod1, mod1.read().rindex('f'), 'g', processes=2)
+        self.assertEquals('def g():\n    pass\n', mod1.read())
+        self.assertEquals('import mod1\nmod1.g()\n', mod2.read())
+        self.assertEquals('from mod1 import g\ng()\n', mod3.read())
+
+    def test_renaming_modules_in_worker_processes(self):
+        mod1 = testutils.create_module(self.project, 'mod1')
+        mod2 = testutils.create_module(self.project, 'mod2')
+        mod3 = testutils.create_module(self.project, 'mod3')
+        mod2.write('import mod1\n')
+        mod3.write('from mod1 import *\n')
+        self._rename(mod1, None, 'newmod', processes=2)
+        self.assertFalse(mod1.exists())
+        self.assertEquals('import newmod\n', mod2.read())
+        self.assertEquals('from newmod import *\n', mod3.read())
+
     # XXX: with variables should not leak
     @testutils.only_for('2.5')
     def xxx_test_with_statement_variables_should_not_leak(self):
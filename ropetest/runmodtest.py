@@ -1,7 +1,9 @@
 import os
+import threading
 import unittest
 
 from rope.base import exceptions
+from rope.base.oi import doa
 from ropetest import testutils
 
 
@@ -143,9 +145,79 @@ class PythonFileRunnerTest(unittest.TestCase):
         self.assertEquals('run', self.get_output_file_content(file_path))
 
 
+    def test_counting_analyzed_calls(self):
+        file_path = 'sample.py'
+        self.make_sample_python_file(file_path)
+        file_resource = self.project.get_resource(file_path)
+        runner = self.pycore.run_module(file_resource)
+        runner.wait_process()
+        self.assertEquals(0, runner.ingestor.dropped)
+        self.assertTrue(runner.ingestor.processed > 0)
+
+
+class DataIngestorTest(unittest.TestCase):
+
+    def setUp(self):
+        super(DataIngestorTest, self).setUp()
+        self.analyzed = []
+
+    def test_analyzing_calls(self):
+        ingestor = doa.DataIngestor(self.analyzed.append)
+        ingestor.start()
+        ingestor.put(('call', 1))
+        ingestor.put(('call', 2))
+        ingestor.finish()
+        self.assertEquals([('call', 1), ('call', 2)], self.analyzed)
+        self.assertEquals(2, ingestor.processed)
+
+    def test_skipping_duplicate_calls(self):
+        ingestor = doa.DataIngestor(self.analyzed.append)
+        ingestor.start()
+        for i in range(10):
+            ingestor.put(('call', 1))
+        ingestor.finish()
+        self.assertEquals([('call', 1)], self.analyzed)
+        self.assertEquals(1, ingestor.processed)
+        self.assertEquals(9, ingestor.duplicates)
+
+    def test_dropping_calls_when_the_queue_is_full(self):
+        ingestor = doa.DataIngestor(self.analyzed.append, maxsize=2)
+        for i in range(5):
+            ingestor.put(('call', i))
+        self.assertEquals(3, ingestor.dropped)
+        ingestor.start()
+        ingestor.finish()
+        self.assertEquals([('call', 0), ('call', 1)], self.analyzed)
+
+    def test_holding_the_lock_when_analyzing(self):
+        lock = threading.Lock()
+        def analyze(data):
+            self.analyzed.append(lock.locked())
+        ingestor = doa.DataIngestor(analyze, lock)
+        ingestor.start()
+        ingestor.put(('call', 1))
+        ingestor.finish()
+        self.assertEquals([True], self.analyzed)
+
+    def test_counting_calls_whose_analysis_fails(self):
+        def analyze(data):
+            if data[1] == 1:
+                raise ValueError()
+            self.analyzed.append(data)
+        ingestor = doa.DataIngestor(analyze)
+        ingestor.start()
+        ingestor.put(('call', 1))
+        ingestor.put(('call', 2))
+        ingestor.finish()
+        self.assertEquals([('call', 2)], self.analyzed)
+        self.assertEquals(1, ingestor.errors)
+        self.assertEquals(1, ingestor.processed)
+
+
 def suite():
     result = unittest.TestSuite()
     result.addTests(unittest.makeSuite(PythonFileRunnerTest))
+    result.addTests(unittest.makeSuite(DataIngestorTest))
     return result
 
 if __name__ == '__main__':
@@ -1,6 +1,7 @@
+import threading
 import unittest
 
-from rope.base import simplify
+from rope.base import simplify, utils
 
 
 class SimplifyTest(unittest.TestCase):
@@ -58,10 +59,100 @@ class SimplifyTest(unittest.TestCase):
         code = 'a = 1;b = 2\n'
         self.assertEquals('a = 1\nb = 2\n', simplify.real_code(code))
 
+    def test_source_info_ignored_regions(self):
+        code = 'a = "#"  # comment\n'
+        info = simplify.get_info(code)
+        self.assertEquals([(4, 7), (9, 18)], info.ignored_regions)
+        self.assertTrue(info.is_ignored(5))
+        self.assertFalse(info.is_ignored(7))
+        self.assertFalse(info.is_in_comment(5))
+        self.assertTrue(info.is_in_comment(12))
+
+    def test_source_info_lines(self):
+        code = 'a = (1,\n     2)\nb = 3\n'
+        info = simplify.get_info(code)
+        self.assertEquals("b = 3", info.lines.get_line(3))
+        self.assertEquals((1, 2), info.logical_lines.logical_line_in(2))
+
+
+class _Result(object):
+    pass
+
+
+class CachedTest(unittest.TestCase):
+
+    def setUp(self):
+        super(CachedTest, self).setUp()
+        self.calls = []
+
+    def _create(self, count, weak=False):
+        @utils.cached(count, weak=weak)
+        def func(arg):
+            self.calls.append(arg)
+            return _Result()
+        return func
+
+    def test_caching_results(self):
+        func = self._create(2)
+        self.assertTrue(func(1) is func(1))
+        self.assertEquals([1], self.calls)
+        self.assertEquals((1, 1), (func.hits, func.misses))
+
+    def test_removing_least_recently_used_results(self):
+        func = self._create(2)
+        func(1)
+        func(2)
+        func(1)
+        func(3)
+        func(1)
+        func(2)
+        self.assertEquals([1, 2, 3, 2], self.calls)
+
+    def test_unhashable_parameters(self):
+        func = self._create(2)
+        func([1])
+        func([1])
+        self.assertEquals([[1], [1]], self.calls)
+
+    def test_weak_results(self):
+        func = self._create(2, weak=True)
+        result = func(1)
+        self.assertTrue(result is func(1))
+        del result
+        func(1)
+        self.assertEquals([1, 1], self.calls)
+
+    def test_calling_from_many_threads(self):
+        func = self._create(3)
+        def call():
+            for i in range(200):
+                func(i % 5)
+        threads = [threading.Thread(target=call) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals(800, func.hits + func.misses)
+        self.assertEquals(3, len(func.cache))
+        link = func.root[1]
+        keys = []
+        while link is not func.root:
+            keys.append(link[2])
+            link = link[1]
+        self.assertEquals(sorted(func.cache), sorted(keys))
+
+    def test_caching_real_code(self):
+        code = 'a = 1\n'
+        simplify.real_code(code)
+        hits = simplify.get_info.hits
+        simplify.real_code(''.join(list(code)))
+        self.assertEquals(hits + 1, simplify.get_info.hits)
+
 
 def suite():
     result = unittest.TestSuite()
     result.addTests(unittest.makeSuite(SimplifyTest))
+    result.addTests(unittest.makeSuite(CachedTest))
     return result
 
 if __name__ == '__main__':